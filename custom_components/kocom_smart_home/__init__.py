@@ -4,23 +4,50 @@ Custom integration to integrate Kocom Smart Home with Home Assistant.
 
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN, PLATFORMS, LOGGER
+from .const import DOMAIN, PLATFORMS, LOGGER, STORAGE_VERSION
 from .api import KocomHomeAPI
+from .scheduler import KocomScheduler
+from .push import async_setup_push, async_remove_push
+from .services import async_setup_services
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Integration setup."""
+    async_setup_services(hass)
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up a config entry."""
     api = KocomHomeAPI(hass)
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = api
+    scheduler = KocomScheduler(hass, entry, api)
 
+    # Entities are created from the cache when it exists, live state follows in the background.
+    from_cache = await scheduler.async_load_cache()
     await api.initialize_devices(entry)
+    entry.async_on_unload(api.async_close)
+    await scheduler.async_discover()
+    if not scheduler.devices:
+        # Nothing cached and nothing discovered, let Home Assistant retry the setup.
+        raise ConfigEntryNotReady("No Kocom devices could be discovered from the apartment server")
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = scheduler
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    scheduler.async_start(refresh_now=from_cache)
+    entry.async_on_unload(scheduler.async_stop)
+    async_setup_push(hass, entry, scheduler)
+    entry.async_on_unload(lambda: async_remove_push(hass, scheduler))
+    entry.async_create_background_task(
+        hass, scheduler.async_backfill_energy(), f"{entry.title} kocom energy backfill"
+    )
+    if from_cache:
+        entry.async_create_background_task(
+            hass, scheduler.async_rediscover(), f"{entry.title} kocom rediscovery"
+        )
+
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     return True
@@ -34,7 +61,24 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the device cache of a deleted config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Handle options update."""
+    """Handle options update.
+
+    Options are applied to the running scheduler and client, only changed
+    entry data such as the room or switch counts needs a full reload.
+    """
     LOGGER.debug(f"Update Options: {entry.options}")
-    await hass.config_entries.async_reload(entry.entry_id)
+    scheduler = hass.data[DOMAIN][entry.entry_id]
+    if scheduler.needs_reload:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    scheduler.async_apply_options()
+    async_setup_push(hass, entry, scheduler)
+    entry.async_create_background_task(
+        hass, scheduler.api.async_update_options(entry), f"{entry.title} kocom connection options"
+    )
@@ -0,0 +1,88 @@
+"""Circuit breaker for requests to the apartment server."""
+import time
+import random
+
+
+class CircuitBreaker:
+    """Stops requests to a failing server and probes it with exponential backoff.
+
+    The circuit opens after `failure_threshold` consecutive failures. Once
+    the backoff delay has passed it is half-open and lets a single probe
+    through: a success closes it, a failure opens it again with the delay
+    doubled up to `backoff_max`. Delays are spread by +/- `jitter`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        backoff_base: float = 5.0,
+        backoff_max: float = 300.0,
+        jitter: float = 0.2,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_count = 0
+        self.retry_at = 0.0
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are currently refused without contacting the server."""
+        return self.state == self.OPEN and time.monotonic() < self.retry_at
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until the next probe is allowed."""
+        return max(self.retry_at - time.monotonic(), 0.0) if self.state == self.OPEN else 0.0
+
+    def allow_request(self) -> bool:
+        """Return whether a request may be sent, claiming the probe when half-open."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() < self.retry_at:
+                return False
+            self.state = self.HALF_OPEN
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful request."""
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_count = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a failed request, opening the circuit at the threshold or after a failed probe."""
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            delay = min(self.backoff_base * 2 ** self.opened_count, self.backoff_max)
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+            self.opened_count += 1
+            self.state = self.OPEN
+            self.retry_at = time.monotonic() + delay
+
+    def release_probe(self) -> None:
+        """Give the probe back when it was cancelled before it had a result."""
+        self._probing = False
+
+    def stats(self) -> dict:
+        """Return the state of the circuit."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened_count": self.opened_count,
+            "retry_in": round(self.retry_in, 1),
+        }
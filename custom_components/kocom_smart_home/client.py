@@ -0,0 +1,565 @@
+"""Standalone asyncio client for the Kocom kbranch and apartment complex servers.
+
+Only depends on aiohttp, so it can be used and profiled outside Home Assistant.
+"""
+import re
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+from functools import partial
+from datetime import datetime
+from dataclasses import dataclass, field
+
+from aiohttp import ClientSession, DummyCookieJar, TCPConnector
+
+from .utils import generate_digest_header, generate_fcm_token
+from .models import DeviceStatus
+from .request_queue import RequestPriority, RequestQueue
+from .circuit_breaker import CircuitBreaker
+from .metrics import ClientMetrics, EndpointMetrics
+
+LOGGER = logging.getLogger(__name__)
+
+
+class KocomServerError(Exception):
+    """The apartment server did not return a usable response."""
+
+
+class CircuitOpenError(KocomServerError):
+    """Requests are refused while the apartment server is backing off."""
+
+
+@dataclass
+class KocomClientConfig:
+    """Account and household settings of a KocomClient."""
+    user_credentials: dict[str, Any] = field(default_factory=dict)
+    max_room_cnt: int = 6
+    max_switch_cnt: int = 8
+    timeout: float = 5
+    max_connections: int = 2
+    keepalive_timeout: float = 30
+    failure_threshold: int = 3
+    backoff_base: float = 5.0
+    backoff_max: float = 300.0
+
+
+def parse_device_info(data: dict, key: str) -> bool | str | None:
+    """Parse gas and vent device information."""
+    try:
+        if key == "attr":
+            return {
+                "type": data.get("type"),
+                "reg_date": data.get("entry", [{}])[0].get("reg_date"),
+                "id": data.get("entry", [{}])[0].get("id")
+            }
+        
+        entry_list = data.get("entry", [{}])[0].get("list", [])
+        for entry in entry_list:
+            if entry.get("function") == key:
+                if key == "power":
+                    return bool(int(entry.get("value", 0)))
+                else:
+                    return entry.get("value")
+                
+        return None
+    except Exception:
+        return None
+
+
+class KocomClient:
+    """KOCOM API client using an injected aiohttp session."""
+
+    """Base API URL"""
+    API_SERVER_URL = "http://kbranch.kocom.co.kr"
+    API_TYPE_URL = "http://{}/api/{}"
+
+    """Net State Until"""
+    ANDROID_MEMBERSHIP = "4990e9e16a532aa9010403b01e0ee52a"
+    DIGEST_IKOD = "Android!1000001"
+
+    def __init__(self, session: ClientSession, config: KocomClientConfig | None = None) -> None:
+        """Initialize."""
+        self.session = session
+        self.config = config or KocomClientConfig()
+        self.apartment_session: ClientSession | None = None
+        self.request_queue = RequestQueue(self.config.max_connections)
+        self.circuit_breaker = CircuitBreaker(
+            self.config.failure_threshold, self.config.backoff_base, self.config.backoff_max
+        )
+        self.kbranch_tokens: dict[str, str] = {}
+        self.apartment_tokens: dict[str, str] = {}
+        self.token_stats: dict[str, int] = {"hit": 0, "miss": 0}
+        self._token_task: asyncio.Task | None = None
+        self._pending_requests: dict[tuple, asyncio.Future] = {}
+        self.coalesce_stats: dict[str, int] = {"requests": 0, "coalesced": 0}
+        self.metrics = ClientMetrics()
+        self.user_credentials: dict[str, Any] = self.config.user_credentials
+        self.device_settings: dict[str, Any] = {
+            "light": {},
+            "concent": {},
+            "heat": {},  
+            "aircon": {}
+        }
+
+    def set_user_credentials(self, data: dict):
+        """Set user credentials."""
+        if len(data.keys()) == 3:
+            self.user_credentials["password"] = data["pwd"]
+            self.user_credentials["user_id"] = f"00000{str(data['zone'])}00{str(data['id'])}"
+        else:
+            pairing_info = data["list"][0] 
+            pairing_zone, pairing_id = pairing_info["zone"], pairing_info['id']
+
+            self.user_credentials["pairing_info"] = pairing_info
+            self.user_credentials["zone_id"] = f"00{pairing_zone}0{pairing_id}"
+
+    def create_apartment_session(self) -> ClientSession:
+        """Create the dedicated keep-alive session for the apartment server.
+
+        The connector holds at most `max_connections` connections and the
+        request queue is sized to match, so requests wait in the client by
+        priority instead of opening new connections to the apartment server.
+        """
+        self.request_queue = RequestQueue(self.config.max_connections)
+        self.apartment_session = self._new_apartment_session()
+        return self.apartment_session
+
+    def _new_apartment_session(self) -> ClientSession:
+        return ClientSession(
+            connector=TCPConnector(
+                limit=self.config.max_connections,
+                limit_per_host=self.config.max_connections,
+                keepalive_timeout=self.config.keepalive_timeout,
+            ),
+            # Nonce and PHPSESSID are sent explicitly with every request.
+            cookie_jar=DummyCookieJar(),
+        )
+
+    async def async_set_max_connections(self, max_connections: int) -> None:
+        """Apply a new connection limit, closing the old session once its requests had their timeout."""
+        if max_connections == self.config.max_connections or self.apartment_session is None:
+            return
+        self.config.max_connections = max_connections
+        self.request_queue.resize(max_connections)
+        old_session, self.apartment_session = self.apartment_session, self._new_apartment_session()
+        try:
+            await asyncio.sleep(self.config.timeout)
+        finally:
+            await old_session.close()
+
+    async def async_close(self) -> None:
+        """Close the dedicated apartment server session."""
+        if self.apartment_session is not None:
+            await self.apartment_session.close()
+            self.apartment_session = None
+
+    async def _single_flight(self, key: tuple, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `request` unless an identical one is in flight, in which case share its result.
+
+        The shared request is shielded, so a cancelled caller does not cancel
+        it for the others.
+        """
+        if (pending := self._pending_requests.get(key)) is not None:
+            self.coalesce_stats["coalesced"] += 1
+            LOGGER.debug("Coalesced request %s, stats: %s", key, self.coalesce_stats)
+            return await asyncio.shield(pending)
+
+        self.coalesce_stats["requests"] += 1
+        pending = asyncio.ensure_future(request())
+        self._pending_requests[key] = pending
+
+        def _clear(task: asyncio.Future) -> None:
+            if self._pending_requests.get(key) is task:
+                del self._pending_requests[key]
+            if not task.cancelled():
+                # Retrieved here in case every caller was cancelled.
+                task.exception()
+
+        pending.add_done_callback(_clear)
+        return await asyncio.shield(pending)
+
+    async def update_device_state(
+        self, device: str, priority: RequestPriority = RequestPriority.POLL
+    ) -> dict[str, Any]:
+        """Check and update the state of a device, sharing one poll between concurrent callers."""
+        return await self._single_flight(
+            ("state", device), partial(self._update_device_state, device, priority)
+        )
+
+    async def _update_device_state(self, device: str, priority: RequestPriority) -> dict[str, Any]:
+        status = await self.check_device_status(device, priority=priority)
+        if status is None:
+            raise KocomServerError(f"No '{device}' status from the apartment server")
+
+        self.merge_device_status(status, device)
+        return self.device_settings[device]
+
+    def merge_device_status(self, response: dict, device: str) -> set:
+        """Merge an allstatus-shaped response into the last known state of `device`.
+
+        Only the rooms and functions in the response are touched, so one bad
+        or partial response cannot wipe the rest. Returns the changed keys and
+        raises KocomServerError for a response of another type or with entries
+        that do not parse.
+        """
+        if response.get("type") != device:
+            raise KocomServerError(f"Expected a '{device}' status, got '{response.get('type')}'")
+        device_status = self.extract_meaningful_data(response)
+        if response.get("entry") and not device_status.functions:
+            raise KocomServerError(f"Malformed '{device}' status from the apartment server")
+        if current_status := self.device_settings[device].get("data"):
+            return current_status.merge(device_status)
+        self.device_settings[device]["data"] = device_status
+        return set(device_status.functions)
+
+    async def fetch_kbranch_token(self):
+        """Gets the authentication token of the kbranch kocom server."""
+        session = self.session
+        try: 
+            response = await session.get(f"{self.API_SERVER_URL}/api/sphone")
+
+            session_id = re.search(r'PHPSESSID=[a-zA-Z0-9]+', response.headers.get("Set-Cookie", ""))
+            nonce_id = re.search(r'nonce="([^"]+)"', response.headers.get("WWW-Authenticate", ""))
+            self.kbranch_tokens = {"cookie": session_id.group(), "nonce": nonce_id.group(1)}
+        except Exception as ex:
+            LOGGER.error("Request failed to get FCM authentication token from Kocom server, %s", ex)
+    
+    async def fetch_apartment_server_token(self):
+        """Gets the authentication token of the apartment server."""
+        server_ip = self.user_credentials["pairing_info"]["svrip"]
+        zone_id = self.user_credentials["zone_id"]
+
+        url = self.API_TYPE_URL.format(server_ip, zone_id)
+
+        started = time.monotonic()
+        success = False
+        try: 
+            # Every other request waits for the handshake, so it goes first.
+            async with self.request_queue.slot(RequestPriority.COMMAND):
+                session = self.apartment_session or self.session
+                async with session.get(url, timeout=self.config.timeout) as response:
+                    set_cookie = response.headers.get("Set-Cookie", "")
+                    www_authenticate = response.headers.get("WWW-Authenticate", "")
+
+            session_id = re.search(r'PHPSESSID=[a-zA-Z0-9]+', set_cookie)
+            nonce_id = re.search(r'nonce="([^"]+)"', www_authenticate)
+            self.apartment_tokens = {"cookie": session_id.group(), "nonce": nonce_id.group(1)}
+            success = True
+        except Exception as ex:
+            LOGGER.error("Request failed while retrieving authentication token for apartment server, %s", ex)
+        self.metrics.endpoint("handshake").record((time.monotonic() - started) * 1000, success)
+
+    async def ensure_apartment_token(self, stale: dict | None = None) -> dict[str, str]:
+        """Return the cached apartment server token, sharing one handshake between concurrent callers."""
+        if stale is not None and self.apartment_tokens is stale:
+            self.apartment_tokens = {}
+
+        if self.apartment_tokens:
+            self.token_stats["hit"] += 1
+            return self.apartment_tokens
+
+        if self.circuit_breaker.is_open:
+            return self.apartment_tokens
+
+        if self._token_task is None:
+            self.token_stats["miss"] += 1
+            self._token_task = asyncio.ensure_future(self.fetch_apartment_server_token())
+            self._token_task.add_done_callback(self._clear_token_task)
+
+        await asyncio.shield(self._token_task)
+        return self.apartment_tokens
+
+    def _clear_token_task(self, task: asyncio.Task) -> None:
+        """Forget the finished handshake so the next miss starts a new one."""
+        if self._token_task is task:
+            self._token_task = None
+
+    async def request_apartment_server(
+        self, path: str, data: dict | None = None, priority: RequestPriority = RequestPriority.POLL
+    ) -> dict:
+        """Signed request to the apartment server, retried once with a new token if it is rejected."""
+        endpoint = self.metrics.endpoint(self.metrics.endpoint_name(path))
+        if not self.circuit_breaker.allow_request():
+            endpoint.rejected += 1
+            raise CircuitOpenError(
+                f"Apartment server is backing off, next try in {self.circuit_breaker.retry_in:.0f} seconds"
+            )
+
+        started = time.monotonic()
+        try:
+            json_data = await self._request_apartment_server(path, data, priority, endpoint)
+        except asyncio.CancelledError:
+            self.circuit_breaker.release_probe()
+            raise
+        except Exception:
+            self.circuit_breaker.record_failure()
+            endpoint.record((time.monotonic() - started) * 1000, False)
+            raise
+
+        self.circuit_breaker.record_success()
+        endpoint.record((time.monotonic() - started) * 1000, True)
+        return json_data
+
+    async def _request_apartment_server(
+        self, path: str, data: dict | None, priority: RequestPriority, endpoint: EndpointMetrics
+    ) -> dict:
+        server_ip = self.user_credentials["pairing_info"]["svrip"]
+        zone_id = self.user_credentials["zone_id"]
+
+        url = self.API_TYPE_URL.format(server_ip, zone_id)
+
+        tokens = await self.ensure_apartment_token()
+        for attempt in range(2):
+            if not tokens:
+                raise KocomServerError("No authentication token from the apartment server")
+            headers = {
+                "Authorization": generate_digest_header(
+                    self.user_credentials["user_id"],
+                    self.user_credentials["password"],
+                    f"/api/{zone_id}{path}",
+                    tokens["nonce"]
+                ),
+                "Cookie": tokens["cookie"],
+            }
+            async with self.request_queue.slot(priority):
+                # Looked up with the slot held, so a queued request never uses a session
+                # that async_set_max_connections is about to close.
+                session = self.apartment_session or self.session
+                async with session.get(
+                    url+path, headers=headers, json=data, timeout=self.config.timeout
+                ) as response:
+                    endpoint.bytes_received += len(await response.read())
+                    if response.status >= 500:
+                        raise KocomServerError(f"Apartment server error {response.status}")
+                    if response.status != 401 or attempt == 1:
+                        LOGGER.debug("Apartment server token stats: %s", self.token_stats)
+                        return await response.json(content_type="text/html")
+
+            LOGGER.debug("Apartment server rejected the cached nonce, fetching a new token.")
+            tokens = await self.ensure_apartment_token(stale=tokens)
+
+    async def fetch_energy_stdcheck(
+        self,
+        path: str = "/energy/stdcheck/",
+        year_month: str | None = None,
+        priority: RequestPriority = RequestPriority.ENERGY,
+    ) -> dict:
+        """Obtain energy usage of a month (YYYYMM, the current month by default) and the month before."""
+        if year_month is None:
+            year_month = datetime.now().strftime("%Y%m")
+
+        return await self._single_flight(
+            ("energy", path, year_month), partial(self._fetch_energy_stdcheck, path, year_month, priority)
+        )
+
+    async def _fetch_energy_stdcheck(self, path: str, year_month: str, priority: RequestPriority) -> dict:
+        try: 
+            json_data = await self.request_apartment_server(path + year_month, priority=priority)
+            LOGGER.debug("Fetch energy stdcheck: %s", json_data)
+            
+            return json_data
+        except CircuitOpenError as ex:
+            LOGGER.debug("Energy usage request skipped, %s", ex)
+        except Exception:
+            LOGGER.error("Request failed while retrieving energy usage from apartment complex server")
+
+    async def request_sphone_login(self, phone_number: str) -> bool:
+        """First sphone login for wallpad authentication"""
+        url = f"{self.API_SERVER_URL}/api/sphone"
+        session = self.session
+
+        if not self.kbranch_tokens:
+            await self.fetch_kbranch_token()
+            LOGGER.debug("Request sphone login  KBRANCH_TOKENS: %s", self.kbranch_tokens)
+
+        headers = {
+            "Authorization": generate_digest_header(
+                self.DIGEST_IKOD,
+                self.ANDROID_MEMBERSHIP,
+                "/api/sphone",
+                self.kbranch_tokens["nonce"]
+            ),
+            "Cookie": self.kbranch_tokens["cookie"],
+        }
+        data = {
+            "phonenum": phone_number,
+            "type": self.DIGEST_IKOD,
+            "token": generate_fcm_token(phone_number)
+        }
+
+        try: 
+            response = await session.get(url, headers=headers, json=data, timeout=self.config.timeout)
+            json_data = await response.json(content_type="text/html")
+
+            self.set_user_credentials(json_data)
+            LOGGER.debug("Request sphone login: %s", json_data)
+
+            return await self.request_pairlist_login()    
+        except Exception:
+            LOGGER.error("Request failed while attempting a login request to the Kocom server, Path: '/api/sphone'")
+            return False
+    
+    async def request_pairlist_login(self) -> dict | bool:
+        """Finds the paired device based on the phone number."""
+        url = f"{self.API_SERVER_URL}/api/{self.user_credentials['user_id']}/pairlist"
+        session = self.session
+
+        headers = {
+            "Authorization": generate_digest_header(
+                self.user_credentials["user_id"],
+                self.user_credentials["password"],
+                f"/api/{self.user_credentials['user_id']}/pairlist",
+                self.kbranch_tokens["nonce"]
+            ),
+            "Cookie": self.kbranch_tokens["cookie"],
+        }
+
+        try: 
+            response = await session.get(url, headers=headers, timeout=self.config.timeout)
+            json_data = await response.json(content_type="text/html")
+            LOGGER.debug("Request pairlist login: %s", json_data)
+            
+            if len(json_data.get("list", 0)) == 1:        
+                self.set_user_credentials(json_data)    
+                LOGGER.info("Pairing Information Found: %s", self.user_credentials["pairing_info"])
+                return self.user_credentials
+            else:
+                LOGGER.info("Pairing information not found.")
+                return {}
+                
+        except Exception:
+            LOGGER.error(
+                "Request failed while attempting a login request to the Kocom server, Path: '/api/%s/pairlist'", 
+                {self.user_credentials["user_id"]}
+            )            
+            return False
+
+    async def request_pairnum_login(self, wallpad_number: str) -> dict | bool:
+        """If there is no paired device, try pairing through authentication number"""
+        url = f"{self.API_SERVER_URL}/api/{self.user_credentials['user_id']}/pairnum"
+        session = self.session
+
+        headers = {
+            "Authorization": generate_digest_header(
+                self.user_credentials["user_id"],
+                self.user_credentials["password"],
+                f"/api/{self.user_credentials['user_id']}/pairnum",
+                self.kbranch_tokens["nonce"]
+            ),
+            "Cookie": self.kbranch_tokens["cookie"],
+        }
+        data = {
+            "pairnum": wallpad_number
+        }
+
+        try: 
+            response = await session.get(url, headers=headers, json=data, timeout=self.config.timeout)
+            json_data = await response.json(content_type="text/html")
+            LOGGER.debug("Request pairnum login: %s", json_data)
+
+            return json_data
+        except Exception:
+            LOGGER.error(
+                "Request failed while attempting a login request to the Kocom server, Path: '/api/%s/pairnum'", 
+                {self.user_credentials["user_id"]}
+            )            
+            return False
+        
+    def current_device_state(self, device: str, id: str, function: str) -> bool | int:
+        """Derive status information from the list of lights, outlets, thermostats, and air conditioners."""
+        device_status = self.device_settings.get(device, {}).get("data")
+        return device_status.get(id, function) if device_status else None
+
+    async def check_device_status(
+        self, device: str, path: str = "/control/allstatus", priority: RequestPriority = RequestPriority.POLL
+    ) -> dict:
+        """Check the status of the device"s entire item, sharing one request between concurrent callers"""
+        return await self._single_flight(
+            ("status", device, path), partial(self._check_device_status, device, path, priority)
+        )
+
+    async def _check_device_status(self, device: str, path: str, priority: RequestPriority) -> dict:
+        data = {
+            "type": device,
+            "cmd": "status"
+        }
+
+        try:
+            json_data = await self.request_apartment_server(path, data, priority)
+            LOGGER.debug("Check device status: %s", json_data)
+            
+            return json_data
+        except CircuitOpenError as ex:
+            LOGGER.debug("Device '%s' status request skipped, %s", device, ex)
+        except Exception:
+            LOGGER.error("Device '%s' status request to apartment server failed, Path: '/control/allstatus'", device)
+
+    async def send_control_request(self, type: str, id: str, function: str, value: str, path: str = "/control") -> dict:
+        """Device Control Request"""
+        data = {
+            "cmd": "control",
+            "type": type,
+            "id": id,
+            "function": function,
+            "value": value
+        }
+
+        try:
+            LOGGER.info(
+                "Prepare a device command request to the apartment server. %s, %s, %s, %s",
+                type, id, function, value
+            )
+            json_data = await self.request_apartment_server(path, data, RequestPriority.COMMAND)
+            LOGGER.debug("send_control_request  %s", json_data)
+
+            return json_data
+        except CircuitOpenError as ex:
+            LOGGER.warning("Device '%s' command not sent, %s", type, ex)
+        except Exception:
+            LOGGER.error("Device '%s' command request to apartment server failed, Path: '/control'", type)
+
+    def extract_meaningful_data(self, response: dict) -> DeviceStatus:
+        """Parse lights/concents/heat/aircon status, dropping rooms and switches beyond the configured counts"""
+        device_status = DeviceStatus()
+        try:
+            max_room_cnt = self.config.max_room_cnt
+            max_switch_cnt = self.config.max_switch_cnt
+            device_status.type = response.get("type")
+            filter_switches = device_status.type in ["light", "concent"]
+
+            for entry in response.get("entry", []):
+                entry_id = entry.get("id", "")
+                if int(entry_id[2:]) > max_room_cnt:
+                    continue
+
+                device_status.rooms[entry_id] = entry.get("reg_date", "")
+                for item in entry.get("list", []):
+                    function = item.get("function", "")
+                    if filter_switches and int(function[3:]) > max_switch_cnt:
+                        continue
+                    device_status.add(entry_id, function, int(item.get("value", 0)))
+        
+            return device_status
+        except Exception as ex:
+            LOGGER.error("There was an error parsing the status type or there was a problem removing the element. %s", ex)
+            return DeviceStatus()
+
+    def update_device_data(self, control_response: dict):
+        """Update device data"""
+        try:
+            device_type = control_response.get("type")
+            entry_list = control_response.get("entry", [])
+        
+            if device_type and entry_list:
+                device_status = self.device_settings.get(device_type, {}).get("data")
+                entry_id = entry_list[0].get("id")
+
+                if device_status and entry_id in device_status.rooms:
+                    for item in entry_list[0].get("list", []):
+                        device_function = device_status.functions.get((entry_id, item.get("function")))
+                        if device_function:
+                            device_function.value = int(item.get("value", 0))
+                    LOGGER.info("%s device data update successful.", device_type.title())
+        except Exception as ex:
+            LOGGER.error("Failed to update the device settings: %s", ex)
@@ -3,21 +3,20 @@ from homeassistant.components.climate.const import PRESET_NONE, PRESET_AWAY
 from homeassistant.components.climate import ClimateEntity, ClimateEntityFeature, HVACMode
 
 from .const import DOMAIN, LOGGER
-from .coordinator import KocomCoordinator
 from .device import KocomEntity
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
-    api = hass.data[DOMAIN][config_entry.entry_id]
+    scheduler = hass.data[DOMAIN][config_entry.entry_id]
     entities_to_add: list = []
 
     coordinators = [
-        KocomCoordinator("heat", api, hass, config_entry),
-        KocomCoordinator("aircon", api, hass, config_entry)
+        scheduler.coordinators["heat"],
+        scheduler.coordinators["aircon"]
     ]
 
     for coordinator in coordinators:
-        devices = await coordinator.get_devices()
+        devices = scheduler.devices.get(coordinator.name, [])
         entities_to_add.extend(
             KocomClimate(coordinator, device)
             for device in devices
@@ -56,13 +55,13 @@ class KocomClimate(KocomEntity, ClimateEntity):
     @property
     def current_temperature(self) -> float:
         """Return the current temperature."""
-        status = self.coordinator.get_device_status(self.unique_id, "nowtemp")
+        status = self.coordinator.get_device_status(self._device_key, "nowtemp")
         return status
 
     @property
     def target_temperature(self) -> float:
         """Return the target temperature."""
-        status = self.coordinator.get_device_status(self.unique_id, "settemp")
+        status = self.coordinator.get_device_status(self._device_key, "settemp")
         return status
 
     @property
@@ -95,7 +94,7 @@ class KocomClimate(KocomEntity, ClimateEntity):
     @property
     def hvac_mode(self):
         """Return hvac operation ie. heat, cool mode."""
-        status = self.coordinator.get_device_status(self.unique_id)
+        status = self.coordinator.get_device_status(self._device_key)
         return self._hvac_modes[1] if status else HVACMode.OFF
     
     @property
@@ -109,7 +108,7 @@ class KocomClimate(KocomEntity, ClimateEntity):
         """Return the current preset mode, e.g., home, away, temp.
         Requires ClimateEntityFeature.PRESET_MODE.
         """
-        status = self.coordinator.get_device_status(self.unique_id, "mode")
+        status = self.coordinator.get_device_status(self._device_key, "mode")
         return PRESET_AWAY if status else PRESET_NONE
 
     @property
@@ -118,17 +117,6 @@ class KocomClimate(KocomEntity, ClimateEntity):
         if self._device_type == "heat":
             self._supported_features |= ClimateEntityFeature.PRESET_MODE
         return self._supported_features
-
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes of the sensor."""
-        return {
-            "Unique ID": self._device["device_id"],
-            "Device room": self._device["device_room"],
-            "Device type": self._device["device_type"],
-            "Registration Date": self._device["reg_date"],
-            "Sync date": self.coordinator._device_info["sync_date"]
-        }
     
     async def async_set_hvac_mode(self, hvac_mode: str) -> None:
         """Set new target hvac mode."""
@@ -140,14 +128,14 @@ class KocomClimate(KocomEntity, ClimateEntity):
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         """Set new target preset mode."""
         if preset_mode == PRESET_AWAY:
-            await self.coordinator.set_device_command(self.unique_id, 1)
-            await self.coordinator.set_device_command(self.unique_id, 1, "mode")
+            await self.coordinator.set_device_commands(
+                self.unique_id, [("power", 1), ("mode", 1)]
+            )
         elif preset_mode == PRESET_NONE:
             await self.coordinator.set_device_command(self.unique_id, 0, "mode")
 
     async def async_set_temperature(self, **kwargs):
         """Set new target temperature."""
-        await self.coordinator.set_device_command(self.unique_id, 1)
-        await self.coordinator.set_device_command(
-            self.unique_id, kwargs.get(ATTR_TEMPERATURE, 20), "settemp"
+        await self.coordinator.set_device_commands(
+            self.unique_id, [("power", 1), ("settemp", kwargs.get(ATTR_TEMPERATURE, 20))]
         )
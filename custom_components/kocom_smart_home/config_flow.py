@@ -8,6 +8,7 @@ from functools import partial
 import homeassistant.helpers.config_validation as cv
 from homeassistant.core import callback
 from homeassistant import config_entries
+from homeassistant.components import webhook
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.config_entries import (
     ConfigEntry,
@@ -16,7 +17,14 @@ from homeassistant.config_entries import (
 )
 
 from .api import KocomHomeAPI
-from .const import DOMAIN, LOGGER
+from .const import (
+    DOMAIN,
+    LOGGER,
+    MAX_CONNECTIONS,
+    ADAPTIVE_MIN_INTERVAL_SEC,
+    ADAPTIVE_MAX_INTERVAL_SEC,
+    ENERGY_HISTORY_MONTHS
+)
 
 def int_between(min_int, max_int):
     """Return an integer between 'min_int' and 'max_int'."""
@@ -143,8 +151,18 @@ class KocomOptionsFlowHandler(OptionsFlow):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle options flow."""
+        errors = {}
+
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            if user_input["min_interval"] > user_input["max_interval"]:
+                errors["base"] = "invalid_interval_bounds"
+            else:
+                if user_input["push_enabled"]:
+                    # The webhook id is the secret of the push endpoint, it is kept once generated.
+                    user_input["push_webhook_id"] = self.config_entry.options.get(
+                        "push_webhook_id", webhook.async_generate_id()
+                    )
+                return self.async_create_entry(title="", data=user_input)
         
         data_schema = vol.Schema({
             vol.Required(
@@ -187,9 +205,33 @@ class KocomOptionsFlowHandler(OptionsFlow):
                 default=self.config_entry.options.get(
                     "totalcontrol_interval", self.config_entry.data["totalcontrol_interval"])
                 ): cv.positive_int,
+            vol.Required(
+                "max_connections",
+                default=self.config_entry.options.get("max_connections", MAX_CONNECTIONS)
+                ): int_between(1, 8),
+            vol.Required(
+                "adaptive_polling",
+                default=self.config_entry.options.get("adaptive_polling", False)
+                ): cv.boolean,
+            vol.Required(
+                "min_interval",
+                default=self.config_entry.options.get("min_interval", ADAPTIVE_MIN_INTERVAL_SEC)
+                ): cv.positive_int,
+            vol.Required(
+                "max_interval",
+                default=self.config_entry.options.get("max_interval", ADAPTIVE_MAX_INTERVAL_SEC)
+                ): cv.positive_int,
+            vol.Required(
+                "energy_history_months",
+                default=self.config_entry.options.get("energy_history_months", ENERGY_HISTORY_MONTHS)
+                ): int_between(0, 36),
+            vol.Required(
+                "push_enabled",
+                default=self.config_entry.options.get("push_enabled", False)
+                ): cv.boolean,
             }
         )
 
         return self.async_show_form(
-            step_id="init", data_schema=data_schema, errors={},
+            step_id="init", data_schema=data_schema, errors=errors,
         )
@@ -12,6 +12,54 @@ VERSION = "1.1.8"
 
 TIMEOUT_SEC = 5
 
+# Connections to the apartment server, also the number of requests in flight
+MAX_CONNECTIONS = 2
+
+DEVICE_TYPES = [
+    "light",
+    "concent",
+    "heat",
+    "aircon",
+    "gas",
+    "vent",
+    "energy",
+    "totalcontrol",
+]
+
+# Polls falling due within this many seconds of each other share one wake-up,
+# and the first polls of each type are staggered by POLL_STAGGER_SEC.
+POLL_MERGE_WINDOW_SEC = 10
+POLL_STAGGER_SEC = 3
+
+# Delay of the verification poll that follows a burst of device commands.
+COMMAND_VERIFY_DELAY_SEC = 5
+
+# Entities keep showing the last known state after polls start failing for
+# STATE_MAX_AGE_INTERVALS poll intervals of their type, and at least this long.
+STATE_MAX_AGE_SEC = 900
+STATE_MAX_AGE_INTERVALS = 2
+
+# Discovered devices and their last known state are kept in this store.
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY_SEC = 30
+
+# Adaptive polling backs off unchanged types by this factor up to the max
+# interval and drops to the min interval after a change or a command.
+ADAPTIVE_MIN_INTERVAL_SEC = 30
+ADAPTIVE_MAX_INTERVAL_SEC = 1800
+ADAPTIVE_BACKOFF_FACTOR = 1.5
+
+# With push enabled, device types are only polled this often as a consistency check.
+PUSH_POLL_INTERVAL_SEC = 1800
+
+# Past months of energy usage imported as statistics by default (0 disables the
+# backfill), and how many of them are fetched at the same time.
+ENERGY_HISTORY_MONTHS = 0
+ENERGY_BACKFILL_CONCURRENCY = 2
+
+# Default number of bulk_control commands in flight at the same time.
+BULK_CONTROL_CONCURRENCY = 3
+
 PLATFORMS = [
     Platform.FAN,
     Platform.LIGHT,
@@ -69,6 +117,14 @@ ELEMENT_INFO = {
     ]
 } 
 
+# Apartment server endpoints with a latency diagnostic sensor.
+DIAGNOSTIC_ENDPOINTS = {
+    "allstatus": "상태 조회",
+    "control": "기기 제어",
+    "energy": "에너지 조회",
+    "handshake": "인증",
+}
+
 ELEMENT_UNITNAME = {
     "value": "우리집",
     "avg": "이번달 평균",
@@ -1,19 +1,28 @@
-import re
+import time
 from datetime import datetime
-from datetime import timedelta
+from typing import Callable
 
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
     VERSION,
     LOGGER,
+    COMMAND_VERIFY_DELAY_SEC,
+    STATE_MAX_AGE_SEC,
+    STATE_MAX_AGE_INTERVALS,
     DEFAULT_TEMP_RANGE,
     ELEMENT_INFO,
     ELEMENT_UNITNAME
 )
-from .api import parse_device_info
+from .client import KocomServerError, parse_device_info
+from .models import DeviceStatus
+from .request_queue import RequestPriority
 
 
 class KocomCoordinator(DataUpdateCoordinator):
@@ -25,70 +34,237 @@ class KocomCoordinator(DataUpdateCoordinator):
         self.api = api
         self.hass = hass
         self.entry = entry
-        name_interval = f"{name}_interval"
-        update_interval = entry.data[name_interval]
         
         if name in ["light", "concent", "heat", "aircon"]:
             self._irdev = True
             self._device_info = api.device_settings[name]
         else:
-            self._device_info = {"data": {}, "sync_date": ""}
+            self._device_info = {"data": {}}
+
+        self._state_snapshot: dict = {}
+        self._notified_status = (True, True)
+        self._verify_requested = False
+        # Monotonic time of the last state change, and a hook called on every command.
+        self.last_changed = 0.0
+        self.last_synced: datetime | None = None
+        self._energy_index: dict[tuple[str, str], dict] = {}
+        self.command_callback: Callable[[], None] | None = None
+        # Returns the current poll interval of this type, set by the scheduler.
+        self.interval_callback: Callable[[], float] | None = None
             
+        # Polls are driven by KocomScheduler, so no per-type timer is started here.
+        # Refresh requests after commands are delayed so a burst shares one poll.
         super().__init__(
-            hass, LOGGER, name=name, update_interval=timedelta(seconds=update_interval)
+            hass,
+            LOGGER,
+            name=name,
+            update_interval=None,
+            request_refresh_debouncer=Debouncer(
+                hass, LOGGER, cooldown=COMMAND_VERIFY_DELAY_SEC, immediate=False
+            ),
         )
     
-    async def get_energy_usage(self) -> dict:
-        energy_usage = await self.api.fetch_energy_stdcheck()
-        self._device_info.update({
-            "data": energy_usage,
-            "sync_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
+    def export_state(self) -> dict:
+        """Return the last known state in a JSON serializable form."""
+        data = self._device_info.get("data")
+        if self._irdev and data:
+            data = data.as_dict()
+        return {
+            "data": data,
+            "last_synced": self.last_synced.isoformat() if self.last_synced else None,
+        }
+
+    def restore_state(self, state: dict) -> None:
+        """Restore the state saved by export_state."""
+        data = state.get("data")
+        if self._irdev and data:
+            data = DeviceStatus.from_dict(data)
+        if data:
+            self._device_info["data"] = data
+            self.last_synced = dt_util.parse_datetime(state.get("last_synced") or "")
+            if self.name == "energy":
+                self._index_energy_usage()
+
+    @property
+    def state_age(self) -> float | None:
+        """Seconds since the last successful poll, None if there never was one."""
+        if self.last_synced is None:
+            return None
+        return (dt_util.utcnow() - self.last_synced).total_seconds()
+
+    @property
+    def state_available(self) -> bool:
+        """Whether the last known state may still be shown after failed polls."""
+        if self.last_update_success:
+            return True
+        state_age = self.state_age
+        return state_age is not None and state_age < self.max_state_age
+
+    @property
+    def max_state_age(self) -> float:
+        """Seconds the last known state is kept, scaled with the poll interval of this type."""
+        interval = self.interval_callback() if self.interval_callback else 0
+        return max(STATE_MAX_AGE_SEC, STATE_MAX_AGE_INTERVALS * interval)
+
+    async def async_refresh(self) -> None:
+        """Refresh and record the time of every successful poll."""
+        await super().async_refresh()
+        if self.last_update_success:
+            self.last_synced = dt_util.utcnow()
+        else:
+            # Repeated failures do not notify, but the cached state may have expired.
+            self.async_update_listeners()
+
+    def _take_state_snapshot(self) -> dict:
+        data = self._device_info.get("data")
+        if self._irdev:
+            return {key: device_function.value for key, device_function in data.functions.items()} if data else {}
+        return dict(data) if data else {}
+
+    def _is_context_changed(self, device_key: tuple[str, str], changed: set) -> bool:
+        room_id, function = device_key
+        if function == "00":
+            return any(key[0] == room_id for key in changed)
+        return device_key in changed
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the entities whose state changed since the last notification."""
+        snapshot = self._take_state_snapshot()
+        changed = {
+            key for key in snapshot.keys() | self._state_snapshot.keys()
+            if snapshot.get(key) != self._state_snapshot.get(key)
+        }
+        if changed:
+            self.last_changed = time.monotonic()
+        status = (self.last_update_success, self.state_available)
+        if status != self._notified_status:
+            changed = None
+        self._state_snapshot = snapshot
+        self._notified_status = status
+
+        if changed is not None and not changed:
+            return
+
+        for update_callback, context in list(self._listeners.values()):
+            if (changed is None
+                or not self._irdev
+                or context is None
+                or self._is_context_changed(context, changed)
+            ):
+                update_callback()
+
+    async def get_energy_usage(self, priority: RequestPriority = RequestPriority.ENERGY) -> dict:
+        energy_usage = await self.api.fetch_energy_stdcheck(priority=priority)
+        if energy_usage is None:
+            raise KocomServerError("No energy usage from the apartment server")
+        self._device_info["data"] = energy_usage
+        self._index_energy_usage()
         return self._device_info
 
-    async def get_single_device(self, ctrl_resp=None) -> dict:
+    def _index_energy_usage(self) -> None:
+        """Index the energy usage entries by (energy type, month slot) once per fetch.
+
+        The newest month of the response is the "current" slot and the month
+        before it the "previous" one, so at a month rollover the sensors are
+        rebound to the new dates without changing their ids.
+        """
+        usage_list = sorted(
+            (self._device_info.get("data") or {}).get("list", []),
+            key=lambda data_entry: data_entry.get("date", "")
+        )
+        latest_date = usage_list[-1].get("date", "") if usage_list else ""
+        self._energy_index = {
+            (data_entry.get("energy"), self._energy_slot(data_entry.get("date", ""), latest_date)): data_entry
+            for data_entry in usage_list
+        }
+
+    @staticmethod
+    def _energy_slot(date_str: str, latest_date: str) -> str:
+        return "current" if date_str >= latest_date else "previous"
+
+    async def get_single_device(self, ctrl_resp=None, priority: RequestPriority = RequestPriority.POLL) -> dict:
         if ctrl_resp:
             device_state = ctrl_resp
         else:
-            device_state = await self.api.check_device_status(self.name)
+            device_state = await self.api.check_device_status(self.name, priority=priority)
+            if device_state is None:
+                raise KocomServerError(f"No '{self.name}' status from the apartment server")
 
-        if device_state["type"] == "totalcontrol" and device_state["entry"]:         
-            entry_to_list = device_state["entry"][0]["list"][0] # 0: totalcontrol, 1: totalelevator
-            entry_to_list["value"] = ~int(entry_to_list["value"]) & 1
+        if not self._apply_single_device(device_state) and not ctrl_resp:
+            raise KocomServerError(f"Malformed '{self.name}' status from the apartment server")
+        return self._device_info
 
-        power_key = "totallight" if self.name == "totalcontrol" else "power"
-        data_updates = {
-            "attr": parse_device_info(device_state, "attr"),
-            "power": parse_device_info(device_state, power_key),
+    def _apply_single_device(self, device_state: dict, update_attr: bool = True) -> bool:
+        """Merge the functions present in a gas, vent or totalcontrol state into the cached state.
+
+        Functions missing from the state keep their value. Returns False and
+        changes nothing when the state has no usable function list.
+        """
+        entries = device_state.get("entry")
+        if not (isinstance(entries, list) and entries and isinstance(entries[0], dict)
+                and isinstance(entries[0].get("list"), list)):
+            return False
+        values = {
+            item["function"]: item.get("value")
+            for item in entries[0]["list"] if isinstance(item, dict) and "function" in item
         }
-        if self.name == "vent":
-            data_updates["wind"] = parse_device_info(device_state, "wind")
+
+        power_key = "totallight" if self.name == "totalcontrol" else "power"
+        data_updates = {}
+        if update_attr:
+            data_updates["attr"] = parse_device_info(device_state, "attr")
+        try:
+            if power_key in values:
+                power = int(values[power_key])
+                # Inverted for totalcontrol, 0: totalcontrol, 1: totalelevator
+                data_updates["power"] = ~power & 1 if self.name == "totalcontrol" else bool(power)
+        except (TypeError, ValueError):
+            return False
+        if self.name == "vent" and "wind" in values:
+            data_updates["wind"] = values["wind"]
 
         self._device_info["data"].update(data_updates)
-        self._update_sync_date()
+        return True
 
-        return self._device_info
+    @callback
+    def async_apply_push(self, payload: dict) -> bool:
+        """Apply a pushed allstatus-shaped payload and notify the entities it changed.
+
+        Only the functions in the payload are merged, the device attributes
+        are left to the polls. A push is as fresh as a successful poll, so it
+        also renews last_synced. Returns False for a payload without state.
+        """
+        if self._irdev:
+            if not payload.get("entry"):
+                return False
+            try:
+                self.api.merge_device_status(payload, self.name)
+            except KocomServerError as ex:
+                LOGGER.debug("Pushed '%s' payload not applied, %s", self.name, ex)
+                return False
+        elif not self._apply_single_device(payload, update_attr=False):
+            return False
+        self.last_synced = dt_util.utcnow()
+        self.async_update_listeners()
+        return True
     
-    def _energy_usage_state(self, unique_id: str, target_date: str) -> dict:
-        pattern = r"(elec|gas|water|hotwater|heat).*?(value|avg|price)"
-        match = re.search(pattern, unique_id)
-        if match:
-            energy_type, data_type = match.group(1), match.group(2)
-            for data_entry in self._device_info["data"]["list"]:
-                if (data_entry["energy"] == energy_type
-                    and data_entry["date"] == target_date
-                ):
-                    return data_entry[data_type]
-        else:
-            LOGGER.warning("Unable to update energy usage information.")
+    def get_energy_value(self, energy_key: tuple[str, str, str]) -> str | None:
+        """Return the (energy type, month slot, field) value of the last energy usage fetch."""
+        energy_type, slot, data_type = energy_key
+        return self._energy_index.get((energy_type, slot), {}).get(data_type)
     
-    def get_device_status(self, unique_id: str = None, function: str = "power") -> bool:
-        if self._irdev and unique_id:
-            id_parts = unique_id.split("-")[0].split("_")
-            id = id_parts[0].title()
-            if id_parts[1] == "00":
-                id_parts[1] = function
-            return self.api.current_device_state(self.name, id, id_parts[1])
+    def parse_device_key(self, unique_id: str) -> tuple[str, str]:
+        """Split a unique id into its (room id, function) state lookup key."""
+        id_parts = unique_id.split("-")[0].split("_")
+        return id_parts[0].title(), id_parts[1]
+
+    def get_device_status(self, device_key: tuple[str, str] = None, function: str = "power") -> bool:
+        if self._irdev and device_key:
+            id, key_function = device_key
+            if key_function == "00":
+                key_function = function
+            return self.api.current_device_state(self.name, id, key_function)
         else:
             return self._device_info.get("data", {}).get(function)
         
@@ -109,46 +285,104 @@ class KocomCoordinator(DataUpdateCoordinator):
 
         return id, function, value
 
-    def _is_previous_month(self, date_str: str) -> bool:
-        try:
-            previous_month = int(date_str.split()[0].replace("-", "")) // 100
-            current_year_month = int(datetime.now().strftime("%Y%m"))
-            return current_year_month > previous_month
-        except Exception:
-            return False
-        
-    def _update_sync_date(self):
-        self._device_info.update({
-            "sync_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-
     async def _async_update_data(self) -> None:
-        if self.name in ["gas", "vent", "totalcontrol"]:
-            return await self.update_single_device()
-        elif self.name == "energy":
-            return await self.update_energy_usage()
-        else:
-            return await self.update_room_device()
+        # Refreshes requested after a command go ahead of the periodic polls.
+        priority = RequestPriority.VERIFY if self._verify_requested else RequestPriority.POLL
+        self._verify_requested = False
+
+        # Failed polls keep the cached state, entities go unavailable once it is too old.
+        try:
+            if self.name in ["gas", "vent", "totalcontrol"]:
+                return await self.update_single_device(priority)
+            elif self.name == "energy":
+                return await self.update_energy_usage()
+            else:
+                return await self.update_room_device(priority)
+        except KocomServerError as ex:
+            raise UpdateFailed(str(ex)) from ex
     
-    async def set_device_command(
-        self, unique_id: str, value: int, function: str = "power"
+    def _apply_intended_state(
+        self, id: str, command_function: str, command_value: int, function: str, value: int
     ) -> None:
-        id, function, value = self._interpret_command(unique_id, value, function)
-        ctrl_resp = await self.api.send_control_request(self.name, id, function, value)
+        if self._irdev:
+            device_status = self._device_info.get("data")
+            if device_status and (device_function := device_status.functions.get((id, command_function))):
+                device_function.value = int(command_value)
+        else:
+            self._device_info["data"][function] = bool(value) if function == "power" else value
 
+    def _is_command_satisfied(self, id: str, command_function: str, command_value: int, function: str, value: int) -> bool:
         if self._irdev:
+            current = self.api.current_device_state(self.name, id, command_function)
+            return current is not None and current == int(command_value)
+        intended = bool(value) if function == "power" else value
+        return self._device_info["data"].get(function) == intended
+
+    async def _send_device_command(self, unique_id: str, value: int, function: str, skip_satisfied: bool = False) -> bool:
+        id, command_function, command_value = self._interpret_command(unique_id, value, function)
+        if skip_satisfied and self._is_command_satisfied(id, command_function, command_value, function, value):
+            LOGGER.debug("Skip '%s' %s command, already %s", id, command_function, command_value)
+            return False
+
+        ctrl_resp = await self.send_control(id, command_function, command_value)
+        if ctrl_resp is None:
+            # The server never got the command, so the cached state stays as it is.
+            raise HomeAssistantError(f"Kocom '{self.name}' command for {id} was not sent")
+        if not ctrl_resp.get("entry"):
+            # Accepted without echoing the state: show the intended result, the debounced refresh verifies it.
+            self._apply_intended_state(id, command_function, command_value, function, value)
+        return True
+
+    async def send_control(self, id: str, function: str, value: int) -> dict | None:
+        """Send an already interpreted command and apply its response to the cached state.
+
+        Returns None when the command was not sent or the request failed.
+        """
+        if self.command_callback:
+            self.command_callback()
+        ctrl_resp = await self.api.send_control_request(self.name, id, function, value)
+        if ctrl_resp and self._irdev:
             self.api.update_device_data(ctrl_resp)
-        else:
+        elif ctrl_resp:
             await self.get_single_device(ctrl_resp)
+        return ctrl_resp
+
+    async def set_device_command(
+        self, unique_id: str, value: int, function: str = "power"
+    ) -> None:
+        await self._send_device_command(unique_id, value, function)
         
+        self.async_update_listeners()
+        await self.async_request_verify()
+
+    async def async_request_verify(self) -> None:
+        """Request the debounced refresh that verifies the state after commands."""
+        self._verify_requested = True
         await self.async_request_refresh()
 
+    async def set_device_commands(self, unique_id: str, commands: list[tuple[str, int]]) -> None:
+        """Send (function, value) steps to one device in order with a single refresh at the end.
+
+        Steps the cached state already satisfies, such as powering on a device
+        that is already on, are skipped.
+        """
+        sent = False
+        try:
+            for function, value in commands:
+                sent |= await self._send_device_command(unique_id, value, function, skip_satisfied=True)
+        finally:
+            # Steps sent before a failed one are shown and verified all the same.
+            if sent:
+                self.async_update_listeners()
+                await self.async_request_verify()
+
     async def specify_elements(self) -> list:
-        energy_usage = await self.get_energy_usage()
+        energy_usage = await self.get_energy_usage(RequestPriority.DISCOVERY)
         devices = []
+        latest_date = max((usage["date"] for usage in energy_usage["data"]["list"]), default="")
 
         for usage_device_info in energy_usage["data"]["list"]:
-            is_prev_month = self._is_previous_month(usage_device_info["date"])
+            is_prev_month = self._energy_slot(usage_device_info["date"], latest_date) == "previous"
             prev_suffix = "_previous" if is_prev_month else ""
             energy_type = usage_device_info["energy"]
 
@@ -178,12 +412,18 @@ class KocomCoordinator(DataUpdateCoordinator):
         LOGGER.debug("Get specify elements: %s", devices)
         return devices
 
-    async def get_devices(self) -> list:
+    async def get_devices(self, refresh: bool = False) -> list:
+        """Build the device list of this type, fetching its state unless it is known.
+
+        With refresh the state is fetched even when it was restored from the cache.
+        Fetches run at discovery priority, which background polls do not hold back.
+        """
         devices = []
+        fetched = True
         if self.name == "energy":
             devices = await self.specify_elements()
         elif self.name in ["gas", "vent", "totalcontrol"]:
-            single_device = await self.get_single_device()
+            single_device = await self.get_single_device(priority=RequestPriority.DISCOVERY)
             entry_device_info = {
                 "device_id": f"{single_device['data']['attr']['id'].lower()}_00",
                 "device_name": {"gas": "가스", "vent": "환기", "totalcontrol": "일괄소등"}[self.name],
@@ -194,43 +434,49 @@ class KocomCoordinator(DataUpdateCoordinator):
             entry_device_info["device_id"] += f"-{self.entry.data['phone_number']}"
             devices.append(entry_device_info)
         else:
-            for entry in self._device_info["data"]["entry"]:
-                for entry_list in entry["list"]:
-                    device_id = entry.get("id", "").lower()
-                    function = entry_list.get("function", "")
-                    device_name = f"{entry.get('id', '')} {function}" if function else f"{entry.get('id', '')} 00"
-                    device_room = entry.get("id", "")[-2:] if function else "00"
-                    device_type = self._device_info["data"]["type"]
-                    reg_date = entry.get("reg_date", "")
-
-                    if device_type in ["heat", "aircon"]:
-                        devices.append({
-                            "device_id": f"{device_id}_00-{self.entry.data['phone_number']}",
-                            "device_name": device_name,
-                            "device_room": device_room,
-                            "device_type": device_type,
-                            "reg_date": reg_date,
-                            **DEFAULT_TEMP_RANGE.get(device_type, {})
-                        })
-                    else:
-                        devices.append({
-                            "device_id": f"{device_id}_{function}-{self.entry.data['phone_number']}",
-                            "device_name": device_name,
-                            "device_room": device_room,
-                            "device_type": device_type,
-                            "reg_date": reg_date
-                        })
+            fetched = refresh or "data" not in self._device_info
+            if fetched:
+                await self.api.update_device_state(self.name, RequestPriority.DISCOVERY)
+            device_status = self._device_info["data"]
+            for device_function in device_status.functions.values():
+                device_id = device_function.room_id.lower()
+                function = device_function.function
+                device_name = f"{device_function.room_id} {function}" if function else f"{device_function.room_id} 00"
+                device_room = device_function.room_id[-2:] if function else "00"
+                device_type = device_status.type
+                reg_date = device_status.rooms.get(device_function.room_id, "")
+
+                if device_type in ["heat", "aircon"]:
+                    devices.append({
+                        "device_id": f"{device_id}_00-{self.entry.data['phone_number']}",
+                        "device_name": device_name,
+                        "device_room": device_room,
+                        "device_type": device_type,
+                        "reg_date": reg_date,
+                        **DEFAULT_TEMP_RANGE.get(device_type, {})
+                    })
+                else:
+                    devices.append({
+                        "device_id": f"{device_id}_{function}-{self.entry.data['phone_number']}",
+                        "device_name": device_name,
+                        "device_room": device_room,
+                        "device_type": device_type,
+                        "reg_date": reg_date
+                    })
+        if devices and fetched:
+            # Discovery fetched live state, which counts as a sync until the first poll.
+            self.last_synced = dt_util.utcnow()
         LOGGER.debug("Get devices: %s", devices)
         return devices
 
-    async def update_single_device(self) -> None:
-        return await self.get_single_device()
+    async def update_single_device(self, priority: RequestPriority = RequestPriority.POLL) -> None:
+        return await self.get_single_device(priority=priority)
     
     async def update_energy_usage(self) -> None:
         return await self.get_energy_usage()
         
-    async def update_room_device(self) -> None:
-        return await self.api.update_device_state(self.name)
+    async def update_room_device(self, priority: RequestPriority = RequestPriority.POLL) -> None:
+        return await self.api.update_device_state(self.name, priority)
 
     def get_device_info(self) -> DeviceInfo:
         is_specific_name = self.name in ["gas", "vent", "totalcontrol", "room"]
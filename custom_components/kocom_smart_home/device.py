@@ -7,6 +7,30 @@ from .coordinator import KocomCoordinator
 
 class KocomEntity(CoordinatorEntity[KocomCoordinator]):
     """Defines a base Kocom entity."""
+
+    def __init__(self, coordinator: KocomCoordinator) -> None:
+        """Initialize and resolve the state lookup key once."""
+        self._device_key = coordinator.parse_device_key(self._device["device_id"])
+        super().__init__(coordinator, context=self._device_key)
+
+        self._static_attributes = {
+            "Unique ID": self._device["device_id"],
+            "Device room": self._device["device_room"],
+            "Device type": self._device["device_type"],
+            "Registration Date": self._device["reg_date"],
+        }
+
+    @property
+    def available(self) -> bool:
+        """Stay available with the last known state for a while after failed polls."""
+        return self.coordinator.state_available
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the device attributes, with the time of the last good poll while it is stale."""
+        if self.coordinator.last_update_success or self.coordinator.last_synced is None:
+            return self._static_attributes
+        return {**self._static_attributes, "Last synced": self.coordinator.last_synced.isoformat()}
     
     @property
     def device_info(self) -> DeviceInfo:
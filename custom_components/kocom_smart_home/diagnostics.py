@@ -0,0 +1,38 @@
+"""Diagnostics support for Kocom Smart Home."""
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {"phone_number", "pairing_data", "password", "user_id", "zone_id", "pairing_info", "svrip", "push_webhook_id"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return the request metrics and polling state of a config entry."""
+    scheduler = hass.data[DOMAIN][entry.entry_id]
+    api = scheduler.api
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "metrics": api.metrics.as_dict(),
+        "circuit_breaker": api.circuit_breaker.stats(),
+        "request_queue": api.request_queue.stats(),
+        "token_stats": api.token_stats,
+        "coalesce_stats": api.coalesce_stats,
+        "push": scheduler.push_receiver.stats if scheduler.push_receiver else None,
+        "coordinators": {
+            name: {
+                "devices": len(scheduler.devices.get(name, [])),
+                "last_update_success": coordinator.last_update_success,
+                "last_synced": coordinator.last_synced.isoformat() if coordinator.last_synced else None,
+                "poll_interval": scheduler.current_interval(name),
+            }
+            for name, coordinator in scheduler.coordinators.items()
+        },
+    }
@@ -0,0 +1,139 @@
+"""Monthly energy usage history imported into the recorder as external statistics."""
+import asyncio
+from datetime import date
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    LOGGER,
+    ELEMENT_INFO,
+    ENERGY_BACKFILL_CONCURRENCY
+)
+from .api import KocomHomeAPI
+
+
+def _shift_month(year: int, month: int, months: int) -> tuple[int, int]:
+    """Return the (year, month) that lies `months` months after the given one."""
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+class KocomEnergyHistory:
+    """Keeps the monthly usage of every energy type and its long-term statistics.
+
+    Each stdcheck response holds the requested month and the month before,
+    so a backfill only has to request every second month.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, api: KocomHomeAPI) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.api = api
+        # energy type -> "YYYY-MM" -> usage of that month
+        self.months: dict[str, dict[str, float]] = {}
+
+    def export_state(self) -> dict:
+        """Return the monthly usage for the persistent cache."""
+        return self.months
+
+    def restore_state(self, months: dict) -> None:
+        """Restore the monthly usage saved by export_state."""
+        self.months = {energy: dict(usage) for energy, usage in months.items()}
+
+    def statistic_id(self, energy: str) -> str:
+        """Return the external statistic id of an energy type."""
+        return f"{DOMAIN}:{energy}_usage_{self.entry.data['phone_number']}"
+
+    def merge(self, usage: dict | None) -> dict[str, str]:
+        """Merge a stdcheck response and return the earliest changed month of each energy type."""
+        changed: dict[str, str] = {}
+        for usage_entry in (usage or {}).get("list", []):
+            energy = usage_entry.get("energy")
+            if energy not in ELEMENT_INFO:
+                continue
+            try:
+                value = float(usage_entry["value"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            month = usage_entry.get("date", "")[:7]
+            energy_months = self.months.setdefault(energy, {})
+            if energy_months.get(month) != value:
+                energy_months[month] = value
+                changed[energy] = min(changed.get(energy, month), month)
+        return changed
+
+    @callback
+    def async_process_usage(self, usage: dict | None) -> None:
+        """Import the months of a regular energy poll that changed."""
+        self._async_import(self.merge(usage))
+
+    async def async_backfill(self, months: int) -> None:
+        """Fetch the usage of the past `months` months that are missing, a few requests at a time."""
+        today = date.today()
+        known = {month for energy_months in self.months.values() for month in energy_months}
+        wanted = [
+            "%04d-%02d" % _shift_month(today.year, today.month, -offset)
+            for offset in range(1, months + 1)
+        ]
+        missing = [month for month in wanted if month not in known]
+        if not missing:
+            return
+
+        # The response for a month also holds the month before it.
+        requests, covered = [], set()
+        for month in missing:
+            if month in covered:
+                continue
+            requests.append(month.replace("-", ""))
+            covered.update({month, "%04d-%02d" % _shift_month(int(month[:4]), int(month[5:]), -1)})
+
+        semaphore = asyncio.Semaphore(ENERGY_BACKFILL_CONCURRENCY)
+
+        async def _fetch(year_month: str) -> dict | None:
+            async with semaphore:
+                return await self.api.fetch_energy_stdcheck(year_month=year_month)
+
+        LOGGER.debug("Backfilling energy usage of %s", requests)
+        changed: dict[str, str] = {}
+        for usage in await asyncio.gather(*(_fetch(year_month) for year_month in requests)):
+            for energy, month in self.merge(usage).items():
+                changed[energy] = min(changed.get(energy, month), month)
+        self._async_import(changed)
+
+    @callback
+    def _async_import(self, changed: dict[str, str]) -> None:
+        """Write the statistics rows of every changed month and the months after it."""
+        if not changed or "recorder" not in self.hass.config.components:
+            return
+
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        for energy, first_changed in changed.items():
+            total = 0.0
+            statistics = []
+            for month, value in sorted(self.months[energy].items()):
+                total += value
+                if month < first_changed:
+                    continue
+                statistics.append({
+                    "start": dt_util.start_of_local_day(date(int(month[:4]), int(month[5:]), 1)),
+                    "state": value,
+                    "sum": total,
+                })
+
+            async_add_external_statistics(
+                self.hass,
+                {
+                    "has_mean": False,
+                    "has_sum": True,
+                    "name": f"KOCOM {ELEMENT_INFO[energy][0]}",
+                    "source": DOMAIN,
+                    "statistic_id": self.statistic_id(energy),
+                    "unit_of_measurement": ELEMENT_INFO[energy][2],
+                },
+                statistics,
+            )
+            LOGGER.debug("Imported %d months of '%s' usage statistics", len(statistics), energy)
@@ -8,7 +8,6 @@ from homeassistant.util.percentage import (
 )
 
 from .const import DOMAIN, LOGGER
-from .coordinator import KocomCoordinator
 from .device import KocomEntity
 
 SPEED_LOW = "1"
@@ -18,10 +17,10 @@ SPEED_LIST = [SPEED_LOW, SPEED_MID, SPEED_HIGH]
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
-    api = hass.data[DOMAIN][config_entry.entry_id]
+    scheduler = hass.data[DOMAIN][config_entry.entry_id]
 
-    coordinator = KocomCoordinator("vent", api, hass, config_entry)
-    devices = await coordinator.get_devices()
+    coordinator = scheduler.coordinators["vent"]
+    devices = scheduler.devices.get(coordinator.name, [])
 
     entities_to_add: list = [
         KocomFan(coordinator, device)
@@ -88,17 +87,6 @@ class KocomFan(KocomEntity, FanEntity):
         """Return the number of speeds the fan supports."""
         return len(SPEED_LIST)
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes of the sensor."""
-        return {
-            "Unique ID": self._device["device_id"],
-            "Device room": self._device["device_room"],
-            "Device type": self._device["device_type"],
-            "Registration Date": self._device["reg_date"],
-            "Sync date": self.coordinator._device_info["sync_date"]
-        }
-
     async def async_turn_on(
         self,
         speed: Optional[str] = None,
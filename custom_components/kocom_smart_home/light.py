@@ -1,21 +1,20 @@
 from homeassistant.components.light import LightEntity, ColorMode
 
 from .const import DOMAIN, LOGGER
-from .coordinator import KocomCoordinator
 from .device import KocomEntity
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
-    api = hass.data[DOMAIN][config_entry.entry_id]
+    scheduler = hass.data[DOMAIN][config_entry.entry_id]
     entities_to_add: list = []
 
     coordinators = [
-        KocomCoordinator("light", api, hass, config_entry),
-        KocomCoordinator("totalcontrol", api, hass, config_entry)
+        scheduler.coordinators["light"],
+        scheduler.coordinators["totalcontrol"]
     ]
 
     for coordinator in coordinators:
-        devices = await coordinator.get_devices()
+        devices = scheduler.devices.get(coordinator.name, [])
         entities_to_add.extend(
             KocomLight(coordinator, device)
             for device in devices
@@ -46,7 +45,7 @@ class KocomLight(KocomEntity, LightEntity):
     @property
     def is_on(self) -> bool:
         """Return true if fan is on."""
-        status = self.coordinator.get_device_status(self.unique_id)
+        status = self.coordinator.get_device_status(self._device_key)
         return status
 
     @property
@@ -58,17 +57,6 @@ class KocomLight(KocomEntity, LightEntity):
     def supported_color_modes(self) -> set[ColorMode]:
         """Return the list of supported color mode."""
         return ColorMode.ONOFF
-
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes of the sensor."""
-        return {
-            "Unique ID": self._device["device_id"],
-            "Device room": self._device["device_room"],
-            "Device type": self._device["device_type"],
-            "Registration Date": self._device["reg_date"],
-            "Sync date": self.coordinator._device_info["sync_date"]
-        }
         
     async def async_turn_on(self, **kwargs):
         """Turn on light."""
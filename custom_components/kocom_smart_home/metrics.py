@@ -0,0 +1,91 @@
+"""Request instrumentation for the apartment server."""
+import statistics
+from collections import deque
+from dataclasses import dataclass, field
+
+# Upper bounds of the latency histogram buckets in milliseconds.
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000)
+
+
+@dataclass
+class EndpointMetrics:
+    """Counters and latency histogram of one apartment server endpoint."""
+    success: int = 0
+    failure: int = 0
+    rejected: int = 0
+    bytes_received: int = 0
+    latency_total_ms: float = 0.0
+    histogram: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    recent_ms: deque = field(default_factory=lambda: deque(maxlen=200))
+
+    def record(self, latency_ms: float, success: bool) -> None:
+        """Count one finished request."""
+        if success:
+            self.success += 1
+        else:
+            self.failure += 1
+        self.latency_total_ms += latency_ms
+        self.recent_ms.append(latency_ms)
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def percentile(self, percent: int) -> float | None:
+        """Latency percentile over the most recent requests in milliseconds."""
+        if len(self.recent_ms) < 2:
+            return round(self.recent_ms[0], 1) if self.recent_ms else None
+        return round(statistics.quantiles(self.recent_ms, n=100)[percent - 1], 1)
+
+    def as_dict(self) -> dict:
+        """Return the counters, latency summary and histogram."""
+        requests = self.success + self.failure
+        return {
+            "success": self.success,
+            "failure": self.failure,
+            "rejected": self.rejected,
+            "bytes_received": self.bytes_received,
+            "latency_avg_ms": round(self.latency_total_ms / requests, 1) if requests else None,
+            "latency_p50_ms": self.percentile(50),
+            "latency_p95_ms": self.percentile(95),
+            "histogram_ms": {
+                **{f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram)},
+                "inf": self.histogram[-1],
+            },
+        }
+
+
+class ClientMetrics:
+    """Per-endpoint request metrics of a KocomClient."""
+
+    def __init__(self) -> None:
+        self.endpoints: dict[str, EndpointMetrics] = {}
+
+    @property
+    def handshakes(self) -> int:
+        """Number of token handshakes with the apartment server."""
+        handshake = self.endpoints.get("handshake")
+        return handshake.success + handshake.failure if handshake else 0
+
+    @staticmethod
+    def endpoint_name(path: str) -> str:
+        """Name the endpoint of a request path, e.g. '/energy/stdcheck/202401' is 'energy'."""
+        if path.startswith("/energy"):
+            return "energy"
+        return path.rstrip("/").rsplit("/", 1)[-1]
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        """Return the metrics of an endpoint, creating them on first use."""
+        if name not in self.endpoints:
+            self.endpoints[name] = EndpointMetrics()
+        return self.endpoints[name]
+
+    def as_dict(self) -> dict:
+        """Return the metrics of every endpoint."""
+        return {
+            "handshakes": self.handshakes,
+            "bytes_received": sum(metrics.bytes_received for metrics in self.endpoints.values()),
+            "endpoints": {name: metrics.as_dict() for name, metrics in self.endpoints.items()},
+        }
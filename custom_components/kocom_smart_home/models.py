@@ -0,0 +1,64 @@
+"""Parsed device state models for Kocom Smart Home."""
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class DeviceFunction:
+    """Value of a single function of a room device, e.g. ('Lt01', 'light1', 255)."""
+    room_id: str
+    function: str
+    value: int
+
+
+@dataclass(slots=True)
+class DeviceStatus:
+    """Parsed allstatus response of one device type."""
+    type: str | None = None
+    rooms: dict[str, str] = field(default_factory=dict)
+    functions: dict[tuple[str, str], DeviceFunction] = field(default_factory=dict)
+
+    def add(self, room_id: str, function: str, value: int) -> None:
+        """Add or replace the value of a function."""
+        self.functions[(room_id, function)] = DeviceFunction(room_id, function, value)
+
+    def merge(self, other: "DeviceStatus") -> set[tuple[str, str]]:
+        """Merge a newer status in place and return the keys whose value changed.
+
+        Functions missing from the newer status keep their last known value.
+        """
+        changed = set()
+        self.type = other.type or self.type
+        self.rooms.update(other.rooms)
+        for key, device_function in other.functions.items():
+            current = self.functions.get(key)
+            if current is None:
+                self.functions[key] = device_function
+                changed.add(key)
+            elif current.value != device_function.value:
+                current.value = device_function.value
+                changed.add(key)
+        return changed
+
+    def get(self, room_id: str, function: str) -> int | None:
+        """Return the value of a function, or None if it is unknown."""
+        device_function = self.functions.get((room_id, function))
+        return device_function.value if device_function else None
+
+    def as_dict(self) -> dict:
+        """Return a JSON serializable form for the persistent cache."""
+        return {
+            "type": self.type,
+            "rooms": self.rooms,
+            "functions": [
+                [device_function.room_id, device_function.function, device_function.value]
+                for device_function in self.functions.values()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DeviceStatus":
+        """Rebuild a status from the form returned by as_dict."""
+        device_status = cls(type=data.get("type"), rooms=dict(data.get("rooms", {})))
+        for room_id, function, value in data.get("functions", []):
+            device_status.add(room_id, function, value)
+        return device_status
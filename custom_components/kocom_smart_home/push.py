@@ -0,0 +1,87 @@
+"""Push ingestion of device state for Kocom Smart Home."""
+from aiohttp import web
+
+from homeassistant.components import webhook
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry
+
+from .const import DOMAIN, LOGGER
+from .scheduler import KocomScheduler
+
+
+class KocomPushReceiver:
+    """Applies pushed device state to the coordinators of an entry.
+
+    Payloads have the shape of an allstatus response, a device `type` and
+    its `entry` list, and may hold only the rooms that changed. The webhook
+    below is one transport, anything else that receives such payloads can
+    hand them to async_apply.
+    """
+
+    def __init__(self, scheduler: KocomScheduler, webhook_id: str) -> None:
+        self.scheduler = scheduler
+        self.webhook_id = webhook_id
+        self.stats = {"received": 0, "applied": 0, "ignored": 0}
+
+    @callback
+    def async_apply(self, payload: dict) -> bool:
+        """Apply one payload, returning False when it is not device state."""
+        self.stats["received"] += 1
+        coordinator = self.scheduler.coordinators.get(payload.get("type"))
+        if coordinator is None or coordinator.name == "energy" or not isinstance(payload.get("entry"), list):
+            self.stats["ignored"] += 1
+            LOGGER.debug("Ignored pushed payload: %s", payload)
+            return False
+
+        if not coordinator.async_apply_push(payload):
+            self.stats["ignored"] += 1
+            LOGGER.debug("Ignored pushed payload without state: %s", payload)
+            return False
+        self.stats["applied"] += 1
+        return True
+
+
+async def _async_handle_webhook(
+    receiver: KocomPushReceiver, hass: HomeAssistant, webhook_id: str, request: web.Request
+) -> web.Response:
+    try:
+        payload = await request.json()
+    except ValueError:
+        return web.Response(status=400)
+
+    payloads = payload if isinstance(payload, list) else [payload]
+    applied = sum(receiver.async_apply(item) for item in payloads if isinstance(item, dict))
+    return web.json_response({"applied": applied})
+
+
+@callback
+def async_setup_push(hass: HomeAssistant, entry: ConfigEntry, scheduler: KocomScheduler) -> None:
+    """Register, replace or remove the push webhook of an entry to match its options."""
+    webhook_id = entry.options.get("push_webhook_id") if scheduler.push_enabled else None
+    if scheduler.push_receiver is not None:
+        if scheduler.push_receiver.webhook_id == webhook_id:
+            return
+        async_remove_push(hass, scheduler)
+    if not webhook_id:
+        return
+
+    receiver = KocomPushReceiver(scheduler, webhook_id)
+    scheduler.push_receiver = receiver
+    webhook.async_register(
+        hass,
+        DOMAIN,
+        f"Kocom {entry.title}",
+        webhook_id,
+        lambda hass, webhook_id, request: _async_handle_webhook(receiver, hass, webhook_id, request),
+        local_only=True,
+        allowed_methods=["POST", "PUT"],
+    )
+    LOGGER.info("Kocom push webhook enabled at %s", webhook.async_generate_path(webhook_id))
+
+
+@callback
+def async_remove_push(hass: HomeAssistant, scheduler: KocomScheduler) -> None:
+    """Unregister the push webhook of an entry, if any."""
+    if scheduler.push_receiver is not None:
+        webhook.async_unregister(hass, scheduler.push_receiver.webhook_id)
+        scheduler.push_receiver = None
@@ -0,0 +1,134 @@
+"""Priority queue for requests to the apartment server."""
+import time
+import heapq
+import asyncio
+import itertools
+from enum import IntEnum
+from contextlib import asynccontextmanager
+
+
+class RequestPriority(IntEnum):
+    """Priority classes of apartment server requests, lower values go first."""
+    COMMAND = 0
+    VERIFY = 1
+    DISCOVERY = 2
+    POLL = 3
+    ENERGY = 4
+
+
+class RequestQueue:
+    """Hands out request slots by priority, then in arrival order.
+
+    Background requests (polls and energy) may use at most `limit - 1`
+    slots, so a command never has to wait for a poll that is already in
+    flight when more than one slot exists. Discovery is not capped, it
+    runs at setup before there is anything to command.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._active = 0
+        self._active_background = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._stats = {
+            priority.name.lower(): {"requests": 0, "waited": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for priority in RequestPriority
+        }
+        self._max_depth = 0
+
+    def _is_background(self, priority: int) -> bool:
+        return priority >= RequestPriority.POLL
+
+    def _can_start(self, priority: int) -> bool:
+        if self._active >= self.limit:
+            return False
+        if self._is_background(priority) and self.limit > 1:
+            return self._active_background < self.limit - 1
+        return True
+
+    def _start(self, priority: int) -> None:
+        self._active += 1
+        if self._is_background(priority):
+            self._active_background += 1
+
+    def _wake_next(self) -> None:
+        """Hand free slots to the best waiters that are allowed to start."""
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_start(priority):
+                # Everything behind it has the same or a lower priority.
+                break
+            heapq.heappop(self._waiters)
+            self._start(priority)
+            future.set_result(None)
+
+    def _release(self, priority: int) -> None:
+        self._active -= 1
+        if self._is_background(priority):
+            self._active_background -= 1
+        self._wake_next()
+
+    def resize(self, limit: int) -> None:
+        """Change the number of slots, requests above a lower limit finish normally."""
+        self.limit = limit
+        self._wake_next()
+
+    @property
+    def depth(self) -> int:
+        """Number of requests waiting for a slot."""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    @asynccontextmanager
+    async def slot(self, priority: RequestPriority):
+        """Wait for a request slot of the given priority and hold it for the block."""
+        stats = self._stats[RequestPriority(priority).name.lower()]
+        stats["requests"] += 1
+
+        queued_before = any(
+            waiter_priority <= priority and not future.done()
+            for waiter_priority, _, future in self._waiters
+        )
+        if not queued_before and self._can_start(priority):
+            self._start(priority)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._counter), future))
+            self._max_depth = max(self._max_depth, self.depth)
+            started = time.monotonic()
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # The slot was handed over just before the cancellation.
+                    self._release(priority)
+                raise
+            waited = time.monotonic() - started
+            stats["waited"] += 1
+            stats["wait_total"] += waited
+            stats["wait_max"] = max(stats["wait_max"], waited)
+
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def stats(self) -> dict:
+        """Return the queue depth and the wait times of every priority class."""
+        return {
+            "depth": self.depth,
+            "max_depth": self._max_depth,
+            "active": self._active,
+            "priorities": {
+                name: {
+                    "requests": stats["requests"],
+                    "waited": stats["waited"],
+                    "wait_avg_ms": round(stats["wait_total"] / stats["waited"] * 1000, 2) if stats["waited"] else 0.0,
+                    "wait_max_ms": round(stats["wait_max"] * 1000, 2),
+                }
+                for name, stats in self._stats.items()
+            },
+        }
@@ -0,0 +1,321 @@
+"""Polling scheduler for Kocom Smart Home."""
+import time
+import asyncio
+from datetime import datetime
+from functools import partial
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    LOGGER,
+    DEVICE_TYPES,
+    POLL_MERGE_WINDOW_SEC,
+    POLL_STAGGER_SEC,
+    ADAPTIVE_MIN_INTERVAL_SEC,
+    ADAPTIVE_MAX_INTERVAL_SEC,
+    ADAPTIVE_BACKOFF_FACTOR,
+    STORAGE_VERSION,
+    STORAGE_SAVE_DELAY_SEC,
+    PUSH_POLL_INTERVAL_SEC,
+    ENERGY_HISTORY_MONTHS
+)
+from .api import KocomHomeAPI
+from .coordinator import KocomCoordinator
+from .energy_history import KocomEnergyHistory
+
+
+class KocomScheduler:
+    """Drives the polls of every device type of an entry from a single timer."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, api: KocomHomeAPI) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.api = api
+        self.coordinators: dict[str, KocomCoordinator] = {
+            name: KocomCoordinator(name, api, hass, entry) for name in DEVICE_TYPES
+        }
+        self.devices: dict[str, list] = {}
+        self.energy_history = KocomEnergyHistory(hass, entry, api)
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+        self._next_poll: dict[str, float] = {}
+        self._intervals: dict[str, float] = {}
+        self._last_command: dict[str, float] = {}
+        self._last_poll: dict[str, float] = {}
+        # Entry data is only applied by a reload, options are applied live.
+        self._entry_data = dict(entry.data)
+        self._backfill_months = 0
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._running = False
+        self._polling = False
+        # Set by push.async_setup_push when the push webhook is registered.
+        self.push_receiver = None
+
+        for name, coordinator in self.coordinators.items():
+            coordinator.command_callback = partial(self._handle_command, name)
+            coordinator.interval_callback = partial(self.current_interval, name)
+
+    def get_interval(self, name: str) -> int:
+        """Return the configured poll interval of a device type in seconds."""
+        key = f"{name}_interval"
+        return self.entry.options.get(key, self.entry.data[key])
+
+    @property
+    def push_enabled(self) -> bool:
+        """Whether device state is pushed, which turns the polls into a slow consistency check."""
+        return self.entry.options.get("push_enabled", False)
+
+    def _is_adaptive(self, name: str) -> bool:
+        # Energy usage is not device state and keeps its configured interval.
+        return (
+            self.entry.options.get("adaptive_polling", False)
+            and not self.push_enabled
+            and name != "energy"
+        )
+
+    def _interval_bounds(self) -> tuple[int, int]:
+        return (
+            self.entry.options.get("min_interval", ADAPTIVE_MIN_INTERVAL_SEC),
+            self.entry.options.get("max_interval", ADAPTIVE_MAX_INTERVAL_SEC),
+        )
+
+    def current_interval(self, name: str) -> float:
+        """Return the interval until the next poll of a type, adapted to its activity when enabled."""
+        if self.push_enabled and name != "energy":
+            return max(self.get_interval(name), PUSH_POLL_INTERVAL_SEC)
+        if not self._is_adaptive(name):
+            return self.get_interval(name)
+        if name not in self._intervals:
+            min_interval, max_interval = self._interval_bounds()
+            self._intervals[name] = min(max(self.get_interval(name), min_interval), max_interval)
+        return self._intervals[name]
+
+    def _adapt_interval(self, name: str, started: float) -> None:
+        """Back off a type that did not change since the poll started, tighten it otherwise."""
+        if not self._is_adaptive(name):
+            return
+        min_interval, max_interval = self._interval_bounds()
+        last_activity = max(self.coordinators[name].last_changed, self._last_command.get(name, 0.0))
+        if last_activity >= started:
+            interval = min_interval
+        else:
+            interval = min(self.current_interval(name) * ADAPTIVE_BACKOFF_FACTOR, max_interval)
+        self._intervals[name] = interval
+        self._next_poll[name] = started + interval
+        LOGGER.debug("Adaptive poll interval of '%s': %.0f seconds", name, interval)
+
+    @callback
+    def _handle_command(self, name: str) -> None:
+        """Poll a type at the min interval once it has been commanded."""
+        if not self._is_adaptive(name):
+            return
+        now = time.monotonic()
+        min_interval, _ = self._interval_bounds()
+        self._last_command[name] = now
+        self._intervals[name] = min_interval
+        if now + min_interval < self._next_poll.get(name, float("inf")):
+            self._next_poll[name] = now + min_interval
+            # A running poll reschedules the wake-up itself when it finishes.
+            if not self._polling:
+                self._schedule_wakeup()
+
+    def _topology(self) -> dict:
+        return {
+            "max_room_cnt": self.entry.data.get("max_room_cnt"),
+            "max_switch_cnt": self.entry.data.get("max_switch_cnt"),
+        }
+
+    async def async_load_cache(self) -> bool:
+        """Restore the cached devices and their last known state.
+
+        Returns False if there is no cache or it was built for other room
+        or switch counts.
+        """
+        cache = await self._store.async_load()
+        if cache:
+            # The energy history does not depend on the room or switch counts.
+            self.energy_history.restore_state(cache.get("energy_history", {}))
+        if not cache or cache.get("topology") != self._topology():
+            return False
+
+        self.devices = cache.get("devices", {})
+        for name, state in cache.get("states", {}).items():
+            if name in self.coordinators:
+                self.coordinators[name].restore_state(state)
+
+        LOGGER.debug("Restored cached devices: %s", list(self.devices))
+        return bool(self.devices)
+
+    def _cache_data(self) -> dict:
+        return {
+            "topology": self._topology(),
+            "devices": self.devices,
+            "states": {
+                name: coordinator.export_state()
+                for name, coordinator in self.coordinators.items()
+            },
+            "energy_history": self.energy_history.export_state(),
+        }
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._cache_data, STORAGE_SAVE_DELAY_SEC)
+
+    async def async_discover(self) -> None:
+        """Discover the devices of every type missing from the cache in one concurrent pass."""
+        missing = [name for name in self.coordinators if name not in self.devices]
+        if not missing:
+            return
+
+        results = await asyncio.gather(
+            *(self.coordinators[name].get_devices() for name in missing),
+            return_exceptions=True
+        )
+        for name, result in zip(missing, results):
+            if isinstance(result, Exception):
+                LOGGER.error("Failed to discover '%s' devices: %s", name, result)
+            elif result:
+                # Empty results are not cached so the type is discovered again next time.
+                self.devices[name] = result
+
+        self._async_schedule_save()
+
+    @property
+    def needs_reload(self) -> bool:
+        """Whether the entry data (credentials, room or switch counts) changed since setup."""
+        return dict(self.entry.data) != self._entry_data
+
+    @callback
+    def async_apply_options(self) -> None:
+        """Apply changed interval, polling and energy history options to the running schedule.
+
+        Adaptive intervals start over from the configured ones, and the next
+        poll of each type is moved to one new interval after its last poll.
+        """
+        self._intervals.clear()
+        now = time.monotonic()
+        for name in self.coordinators:
+            interval = self.current_interval(name)
+            if name in self._last_poll:
+                self._next_poll[name] = max(self._last_poll[name] + interval, now)
+            else:
+                self._next_poll[name] = min(self._next_poll.get(name, now + interval), now + interval)
+        # A running poll reschedules the wake-up itself when it finishes.
+        if not self._polling:
+            self._schedule_wakeup()
+
+        if self.energy_history_months != self._backfill_months:
+            self.entry.async_create_background_task(
+                self.hass, self.async_backfill_energy(), f"{self.entry.title} kocom energy backfill"
+            )
+
+    async def async_rediscover(self) -> None:
+        """Discover every type again after a start from the cache.
+
+        Cached device lists keep entities available right away, but rooms or
+        devices added on the server only show up here. The entry is reloaded
+        when the discovered devices differ from the cached ones.
+        """
+        results = await asyncio.gather(
+            *(coordinator.get_devices(refresh=True) for coordinator in self.coordinators.values()),
+            return_exceptions=True
+        )
+        changed = []
+        for name, result in zip(self.coordinators, results):
+            if isinstance(result, Exception) or not result:
+                # Keep the cached devices of types that could not be discovered now.
+                continue
+            cached_ids = {device["device_id"] for device in self.devices.get(name, [])}
+            if {device["device_id"] for device in result} != cached_ids:
+                changed.append(name)
+            self.devices[name] = result
+
+        if not changed:
+            self._async_schedule_save()
+            return
+        LOGGER.info("Kocom devices changed on the server for %s, reloading", changed)
+        # Saved right away so the reloaded entry starts from the new device lists.
+        await self._store.async_save(self._cache_data())
+        self.hass.config_entries.async_schedule_reload(self.entry.entry_id)
+
+    @property
+    def energy_history_months(self) -> int:
+        """Past months of energy usage kept as statistics, 0 when the history is disabled."""
+        return self.entry.options.get("energy_history_months", ENERGY_HISTORY_MONTHS)
+
+    async def async_backfill_energy(self) -> None:
+        """Import the missing months of energy usage history once, if enabled in the options."""
+        months = self.energy_history_months
+        self._backfill_months = months
+        if months:
+            await self.energy_history.async_backfill(months)
+            self._async_schedule_save()
+
+    @callback
+    def async_start(self, refresh_now: bool = False) -> None:
+        """Schedule the first poll of every type, staggered so they do not start together.
+
+        With refresh_now the first polls start right away, which is used to
+        replace state restored from the cache with live state.
+        """
+        self._running = True
+        now = time.monotonic()
+        for index, name in enumerate(self.coordinators):
+            first_poll = 0 if refresh_now else self.current_interval(name)
+            self._next_poll[name] = now + first_poll + index * POLL_STAGGER_SEC
+        self._schedule_wakeup()
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the pending wake-up."""
+        self._running = False
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def _schedule_wakeup(self) -> None:
+        if not self._running:
+            return
+        if self._unsub_timer:
+            self._unsub_timer()
+        delay = max(min(self._next_poll.values()) - time.monotonic(), 0)
+        self._unsub_timer = async_call_later(self.hass, delay, self._handle_wakeup)
+
+    @callback
+    def _handle_wakeup(self, _now: datetime) -> None:
+        self._unsub_timer = None
+        self._polling = True
+        self.entry.async_create_background_task(
+            self.hass, self._async_poll_due(), f"{self.entry.title} kocom poll"
+        )
+
+    async def _async_poll_due(self) -> None:
+        """Poll every type that is due within the merge window, one after another."""
+        now = time.monotonic()
+        due = [
+            name for name, next_poll in self._next_poll.items()
+            if next_poll <= now + POLL_MERGE_WINDOW_SEC
+        ]
+        LOGGER.debug("Scheduled poll for: %s", due)
+
+        try:
+            # Fetch the token once up front so every poll of this wake-up shares it.
+            await self.api.ensure_apartment_token()
+            for name in due:
+                started = time.monotonic()
+                self._last_poll[name] = started
+                self._next_poll[name] = started + self.current_interval(name)
+                coordinator = self.coordinators[name]
+                await coordinator.async_refresh()
+                self._adapt_interval(name, started)
+                if name == "energy" and coordinator.last_update_success and self.energy_history_months:
+                    # Only the current month is fetched from here on, the backfill did the rest.
+                    self.energy_history.async_process_usage(coordinator.data["data"])
+            self._async_schedule_save()
+        finally:
+            self._polling = False
+            self._schedule_wakeup()
@@ -1,29 +1,136 @@
-from homeassistant.components.sensor import SensorEntity
+from datetime import timedelta
+from typing import Any, Callable
 
-from .const import DOMAIN, LOGGER
-from .coordinator import KocomCoordinator
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
+from homeassistant.const import MATCH_ALL, EntityCategory, UnitOfInformation, UnitOfTime
+
+from .const import DOMAIN, LOGGER, DIAGNOSTIC_ENDPOINTS
 from .device import KocomEntity
 
+# Only the diagnostic sensors poll, they read the client metrics without any request.
+SCAN_INTERVAL = timedelta(seconds=60)
+
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
-    api = hass.data[DOMAIN][config_entry.entry_id]
+    scheduler = hass.data[DOMAIN][config_entry.entry_id]
     entities_to_add: list = []
 
     coordinators = [
-        KocomCoordinator("energy", api, hass, config_entry)
+        scheduler.coordinators["energy"]
     ]
 
     for coordinator in coordinators:
-        devices = await coordinator.get_devices()
+        devices = scheduler.devices.get(coordinator.name, [])
         entities_to_add.extend(
             KocomSensor(coordinator, device)
             for device in devices
         )
+
+    entities_to_add.extend(_diagnostic_sensors(scheduler, config_entry))
     
     if entities_to_add:
         async_add_entities(entities_to_add)
 
 
+def _diagnostic_sensors(scheduler, config_entry) -> list:
+    """Build the sensors reporting the apartment server request metrics."""
+    api = scheduler.api
+    metrics = api.metrics
+    device_info = scheduler.coordinators["gas"].get_device_info()
+    phone_number = config_entry.data["phone_number"]
+
+    sensors = [
+        KocomDiagnosticSensor(
+            device_info,
+            f"apartment_server_{endpoint}_latency-{phone_number}",
+            f"단지 서버 {label} 지연 시간",
+            lambda endpoint=endpoint: metrics.endpoint(endpoint).percentile(95),
+            lambda endpoint=endpoint: metrics.endpoint(endpoint).as_dict(),
+            icon="mdi:timer-outline",
+            unit=UnitOfTime.MILLISECONDS,
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+        )
+        for endpoint, label in DIAGNOSTIC_ENDPOINTS.items()
+    ]
+    sensors.append(KocomDiagnosticSensor(
+        device_info,
+        f"apartment_server_failures-{phone_number}",
+        "단지 서버 요청 실패",
+        lambda: sum(endpoint.failure for endpoint in metrics.endpoints.values()),
+        lambda: {
+            "circuit_breaker": api.circuit_breaker.stats(),
+            **{
+                name: {"success": endpoint.success, "failure": endpoint.failure, "rejected": endpoint.rejected}
+                for name, endpoint in metrics.endpoints.items()
+            },
+        },
+        icon="mdi:alert-circle-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ))
+    sensors.append(KocomDiagnosticSensor(
+        device_info,
+        f"apartment_server_handshakes-{phone_number}",
+        "단지 서버 인증 횟수",
+        lambda: metrics.handshakes,
+        lambda: {"token_stats": api.token_stats, "coalesce_stats": api.coalesce_stats},
+        icon="mdi:key-chain",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ))
+    sensors.append(KocomDiagnosticSensor(
+        device_info,
+        f"apartment_server_bytes_received-{phone_number}",
+        "단지 서버 수신 데이터",
+        lambda: sum(endpoint.bytes_received for endpoint in metrics.endpoints.values()),
+        lambda: {"request_queue": api.request_queue.stats()},
+        icon="mdi:download-network-outline",
+        unit=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ))
+    return sensors
+
+
+class KocomDiagnosticSensor(SensorEntity):
+    """Request metric of the apartment server, read from the client without any request."""
+
+    _attr_should_poll = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _unrecorded_attributes = frozenset({MATCH_ALL})
+
+    def __init__(
+        self,
+        device_info,
+        unique_id: str,
+        name: str,
+        value_fn: Callable[[], Any],
+        attributes_fn: Callable[[], dict],
+        icon: str,
+        unit: str | None = None,
+        device_class: SensorDeviceClass | None = None,
+        state_class: SensorStateClass | None = None,
+    ) -> None:
+        self._value_fn = value_fn
+        self._attributes_fn = attributes_fn
+        self._attr_device_info = device_info
+        self._attr_unique_id = unique_id
+        self._attr_name = name
+        self._attr_icon = icon
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+
+    @property
+    def native_value(self) -> Any:
+        """Return the current value of the metric."""
+        return self._value_fn()
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the details of the metric."""
+        return self._attributes_fn()
+
+
 class KocomSensor(KocomEntity, SensorEntity):
     def __init__(self, coordinator, device) -> None:
         self._device = device
@@ -31,6 +138,13 @@ class KocomSensor(KocomEntity, SensorEntity):
         self._device_name = device["device_name"]
         super().__init__(coordinator)
 
+        # Resolved once, a state read is a dictionary lookup in the coordinator.
+        # Sensors are bound to the current or previous month, not to a date.
+        self._energy_slot = "previous" if device["is_prev_month"] else "current"
+        self._energy_key = (device["device_room"], self._energy_slot, device["device_type"])
+        state_class = device["state_class"]
+        self._state_class = state_class.split("_")[0] if state_class and device["is_prev_month"] else state_class
+
     @property
     def unique_id(self) -> str:
         """Return the entity ID."""
@@ -59,26 +173,16 @@ class KocomSensor(KocomEntity, SensorEntity):
     @property
     def state_class(self):
         """Type of this sensor state."""
-        state_class = self._device["state_class"]
-        if state_class and self._device["is_prev_month"]:
-            return state_class.split("_")[0]
-        else:
-            return state_class
+        return self._state_class
         
     @property
     def state(self):
         """Return the state of the sensor."""
-        return self.coordinator._energy_usage_state(
-            self.unique_id, self._device["reg_date"]
-        )
+        return self.coordinator.get_energy_value(self._energy_key)
 
     @property
-    def extra_state_attributes(self):
-        """Return the state attributes of the sensor."""
-        return {
-            "Unique ID": self._device["device_id"],
-            "Device room": self._device["device_room"],
-            "Device type": self._device["device_type"],
-            "Registration Date": self._device["reg_date"],
-            "Sync date": self.coordinator._device_info["sync_date"]
-        }
+    def extra_state_attributes(self) -> dict:
+        """Return the device attributes with the month the sensor is bound to."""
+        attributes = super().extra_state_attributes
+        usage_date = self.coordinator.get_energy_value((self._device["device_room"], self._energy_slot, "date"))
+        return {**attributes, "Registration Date": usage_date} if usage_date else attributes
@@ -0,0 +1,92 @@
+"""Services for Kocom Smart Home."""
+import asyncio
+
+import voluptuous as vol
+
+import homeassistant.helpers.config_validation as cv
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+
+from .const import DOMAIN, LOGGER, DEVICE_TYPES, BULK_CONTROL_CONCURRENCY
+
+SERVICE_BULK_CONTROL = "bulk_control"
+
+BULK_CONTROL_SCHEMA = vol.Schema(
+    {
+        vol.Optional("config_entry_id"): cv.string,
+        vol.Required("targets"): vol.All(
+            cv.ensure_list,
+            [
+                vol.Schema({
+                    vol.Required("type"): vol.In([name for name in DEVICE_TYPES if name != "energy"]),
+                    vol.Required("id"): cv.string,
+                    vol.Required("function"): cv.string,
+                    vol.Required("value"): vol.Any(int, cv.string),
+                })
+            ],
+        ),
+        vol.Optional("max_concurrency", default=BULK_CONTROL_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=8)
+        ),
+    }
+)
+
+
+def _get_scheduler(hass: HomeAssistant, entry_id: str | None):
+    """Return the scheduler of the requested entry, or of the only loaded entry."""
+    schedulers = hass.data.get(DOMAIN, {})
+    if entry_id:
+        if entry_id not in schedulers:
+            raise ServiceValidationError(f"Kocom config entry '{entry_id}' is not loaded")
+        return schedulers[entry_id]
+    if len(schedulers) != 1:
+        raise ServiceValidationError("config_entry_id is required when not exactly one Kocom entry is loaded")
+    return next(iter(schedulers.values()))
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Kocom Smart Home services."""
+
+    async def async_bulk_control(call: ServiceCall) -> ServiceResponse:
+        """Send many raw control commands with bounded concurrency and one refresh per type."""
+        scheduler = _get_scheduler(hass, call.data.get("config_entry_id"))
+        semaphore = asyncio.Semaphore(call.data["max_concurrency"])
+
+        async def _send(target: dict) -> dict:
+            coordinator = scheduler.coordinators[target["type"]]
+            try:
+                async with semaphore:
+                    ctrl_resp = await coordinator.send_control(
+                        target["id"], target["function"], target["value"]
+                    )
+            except Exception as ex:
+                # One bad target must not abort the others.
+                LOGGER.warning("Bulk control of %s %s failed: %s", target["type"], target["id"], ex)
+                return {**target, "success": False}
+            return {**target, "success": bool(ctrl_resp)}
+
+        targets = call.data["targets"]
+        results = await asyncio.gather(*(_send(target) for target in targets))
+        LOGGER.debug("Bulk control results: %s", results)
+
+        for name in {target["type"] for target in targets}:
+            coordinator = scheduler.coordinators[name]
+            coordinator.async_update_listeners()
+            await coordinator.async_request_verify()
+
+        return {"results": list(results)}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_CONTROL,
+        async_bulk_control,
+        schema=BULK_CONTROL_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
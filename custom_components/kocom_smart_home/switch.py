@@ -1,21 +1,20 @@
 from homeassistant.components.switch import SwitchEntity
 
 from .const import DOMAIN, LOGGER
-from .coordinator import KocomCoordinator
 from .device import KocomEntity
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
-    api = hass.data[DOMAIN][config_entry.entry_id]
+    scheduler = hass.data[DOMAIN][config_entry.entry_id]
     entities_to_add: list = []
 
     coordinators = [
-        KocomCoordinator("gas", api, hass, config_entry),
-        KocomCoordinator("concent", api, hass, config_entry)
+        scheduler.coordinators["gas"],
+        scheduler.coordinators["concent"]
     ]
 
     for coordinator in coordinators:
-        devices = await coordinator.get_devices()
+        devices = scheduler.devices.get(coordinator.name, [])
         entities_to_add.extend(
             KocomSwitch(coordinator, device)
             for device in devices
@@ -54,19 +53,8 @@ class KocomSwitch(KocomEntity, SwitchEntity):
     @property
     def is_on(self) -> bool:
         """Return true if fan is on."""
-        status = self.coordinator.get_device_status(self.unique_id)
+        status = self.coordinator.get_device_status(self._device_key)
         return status
-
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes of the sensor."""
-        return {
-            "Unique ID": self._device["device_id"],
-            "Device room": self._device["device_room"],
-            "Device type": self._device["device_type"],
-            "Registration Date": self._device["reg_date"],
-            "Sync date": self.coordinator._device_info["sync_date"]
-        }
     
     async def async_turn_on(self, **kwargs):
         """Turn on switch."""
@@ -1,7 +1,9 @@
 import random
 import string
 import hashlib
-from .const import LOGGER
+import logging
+
+LOGGER = logging.getLogger(__name__)
 
 def generate_digest_header(username: str, password: str, uri: str, nonce: str) -> str:
     """Authorization header create."""
@@ -0,0 +1,324 @@
+"""Offline benchmark of KocomClient against the local emulator.
+
+Reports the startup time (login and discovery requests), the setup of a
+new client after a restart without a cache (handshake and discovery of
+every type) against one restoring the device cache as the integration
+stores it, the number of HTTP
+requests per poll cycle of every device type, the requests sent for duplicate
+concurrent polls, the p50/p99 latency of control
+commands on an idle connection and while poll cycles run concurrently, the
+request queue statistics and how many requests reach the server during an
+outage before the circuit breaker opens, and whether it closes again. It
+also times a cached state read at --read-rooms x --read-switches against
+the linear scan over the raw allstatus entries that the index replaced,
+and compares the memory the raw allstatus JSON of the room types holds with
+the parsed DeviceStatus models:
+
+    python scripts/benchmark.py --rooms 6 --switches 8 --latency 0.02 --cycles 20 --commands 200
+
+Pass --max-connections 0 to send apartment server requests through the plain
+shared session instead of the dedicated keep-alive pool.
+
+Only aiohttp is required, the client is imported without Home Assistant.
+"""
+import sys
+import json
+import time
+import tempfile
+import timeit
+import tracemalloc
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+
+from kocom_emulator import EmulatorConfig, KocomEmulator
+from kocom_client_loader import load_client_module
+
+client = load_client_module()
+
+ROOM_TYPES = ["light", "concent", "heat", "aircon"]
+SINGLE_TYPES = ["gas", "vent", "totalcontrol"]
+ALL_TYPES = ROOM_TYPES + SINGLE_TYPES + ["energy"]
+
+
+async def poll_cycle(api) -> None:
+    """Poll every device type once, the way the scheduler does in one wake-up."""
+    for device in ROOM_TYPES:
+        try:
+            await api.update_device_state(device)
+        except client.KocomServerError:
+            pass
+    for device in SINGLE_TYPES:
+        await api.check_device_status(device)
+    await api.fetch_energy_stdcheck()
+
+
+async def send_commands(api, count: int) -> list[float]:
+    """Toggle one light `count` times and return the latency of each command in ms."""
+    latencies = []
+    for index in range(count):
+        start = time.perf_counter()
+        await api.send_control_request("light", "Lt01", "sw01", 255 if index % 2 else 0)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def new_client(session, host: str, port: int, args: argparse.Namespace):
+    """Return a KocomClient for the emulator, without tokens or state."""
+    api = client.KocomClient(session, client.KocomClientConfig(
+        max_room_cnt=args.rooms,
+        max_switch_cnt=args.switches,
+        max_connections=args.max_connections or 100,
+        backoff_base=args.backoff_base,
+    ))
+    api.API_SERVER_URL = f"http://{host}:{port}"
+    if args.max_connections:
+        api.create_apartment_session()
+    return api
+
+
+async def discover(api, devices: list[str]) -> dict:
+    """Fetch the state of every listed type concurrently, as async_discover does."""
+    priority = client.RequestPriority.DISCOVERY
+    results = await asyncio.gather(
+        *(
+            api.update_device_state(device, priority) if device in ROOM_TYPES
+            else api.check_device_status(device, priority=priority) if device in SINGLE_TYPES
+            else api.fetch_energy_stdcheck(priority=priority)
+            for device in devices
+        ),
+        return_exceptions=True,
+    )
+    return {
+        device: result for device, result in zip(devices, results)
+        if result and not isinstance(result, Exception)
+    }
+
+
+def cached_states(api, discovered: dict) -> dict:
+    """The discovered state in the JSON form the integration caches it in."""
+    return {
+        device: api.device_settings[device]["data"].as_dict() if device in ROOM_TYPES else result
+        for device, result in discovered.items()
+    }
+
+
+async def measure_start(api, emulator, cache_path: Path | None = None) -> tuple[float, int, dict]:
+    """Time the setup of a new client, from the device cache when a path is given.
+
+    Mirrors async_load_cache followed by async_discover: the cached states
+    are restored and only the types missing from the cache are discovered.
+    Returns the seconds, the requests that reached the emulator and the
+    discovered state.
+    """
+    before = emulator.stats["total"]
+    start = time.perf_counter()
+    states = json.loads(cache_path.read_text())["states"] if cache_path else {}
+    for device, state in states.items():
+        if device in ROOM_TYPES:
+            api.device_settings[device]["data"] = client.DeviceStatus.from_dict(state)
+    discovered = await discover(api, [device for device in ALL_TYPES if device not in states])
+    return time.perf_counter() - start, emulator.stats["total"] - before, discovered
+
+
+def _linear_scan(response: dict, id: str, function: str) -> int | None:
+    """State read over the raw allstatus entries, as it was done before the index."""
+    for device_entry in response.get("entry", []):
+        if device_entry.get("id") == id:
+            for entry_list in device_entry.get("list", []):
+                if entry_list.get("function") == function:
+                    return int(entry_list.get("value", 0))
+    return None
+
+
+def measure_read_cost(rooms: int, switches: int, number: int = 200) -> dict:
+    """Time one current_device_state read of every light switch against the linear scan, in ns per read."""
+    response = {"type": "light", "entry": KocomEmulator(EmulatorConfig(rooms=rooms, switches=switches)).devices["light"]}
+    api = client.KocomClient(None, client.KocomClientConfig(max_room_cnt=rooms, max_switch_cnt=switches))
+    api.merge_device_status(response, "light")
+    keys = [(entry["id"], item["function"]) for entry in response["entry"] for item in entry["list"]]
+
+    def read_indexed() -> None:
+        for id, function in keys:
+            api.current_device_state("light", id, function)
+
+    def read_scan() -> None:
+        for id, function in keys:
+            _linear_scan(response, id, function)
+
+    reads = number * len(keys)
+    indexed_ns = min(timeit.repeat(read_indexed, number=number, repeat=5)) / reads * 1e9
+    scan_ns = min(timeit.repeat(read_scan, number=number, repeat=5)) / reads * 1e9
+    return {
+        "size": f"{rooms} rooms x {switches} switches",
+        "indexed_ns": round(indexed_ns, 1),
+        "linear_scan_ns": round(scan_ns, 1),
+        "speedup": round(scan_ns / indexed_ns, 1),
+    }
+
+
+def _retained_bytes(build) -> int:
+    """Bytes still allocated by the object that `build` returns, once it has returned."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return retained
+
+
+def measure_state_memory(rooms: int, switches: int) -> dict:
+    """Memory held for the light, concent, heat and aircon state as raw JSON and as DeviceStatus."""
+    devices = KocomEmulator(EmulatorConfig(rooms=rooms, switches=switches)).devices
+    bodies = [json.dumps({"type": device, "entry": devices[device]}) for device in ROOM_TYPES]
+    api = client.KocomClient(None, client.KocomClientConfig(max_room_cnt=rooms, max_switch_cnt=switches))
+
+    raw_bytes = _retained_bytes(lambda: [json.loads(body) for body in bodies])
+    # The responses are parsed and dropped, only the models are kept.
+    model_bytes = _retained_bytes(lambda: [api.extract_meaningful_data(json.loads(body)) for body in bodies])
+    return {
+        "size": f"{rooms} rooms x {switches} switches",
+        "raw_json_bytes": raw_bytes,
+        "device_status_bytes": model_bytes,
+        "ratio": round(model_bytes / raw_bytes, 2),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    emulator = KocomEmulator(EmulatorConfig(
+        rooms=args.rooms,
+        switches=args.switches,
+        latency=args.latency,
+        jitter=args.jitter,
+    ))
+    runner = web.AppRunner(emulator.make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    emulator.config.server_address = f"{host}:{port}"
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            api = new_client(session, host, port, args)
+
+            start = time.perf_counter()
+            await api.request_sphone_login("01000000000")
+            await discover(api, ALL_TYPES)
+            startup = time.perf_counter() - start
+            startup_requests = emulator.stats["total"]
+
+            # Setups of new clients with the stored credentials, as after a restart.
+            starts = {}
+            with tempfile.TemporaryDirectory() as directory:
+                cache_path = Path(directory) / "kocom_cache.json"
+                for name, path in (("cold", None), ("cached", cache_path)):
+                    start_api = new_client(session, host, port, args)
+                    start_api.user_credentials = api.user_credentials
+                    starts[name] = await measure_start(start_api, emulator, path)
+                    await start_api.async_close()
+                    if path is None:
+                        cache_path.write_text(json.dumps({"states": cached_states(start_api, starts[name][2])}))
+
+            # Failures are only injected after login so the run can start.
+            emulator.config.error_rate = args.error_rate
+
+            before = emulator.stats["total"]
+            for _ in range(args.cycles):
+                await poll_cycle(api)
+            requests_per_cycle = (emulator.stats["total"] - before) / args.cycles
+
+            before = emulator.stats["total"]
+            await asyncio.gather(*(poll_cycle(api) for _ in range(args.duplicate_polls)))
+            duplicate_requests = emulator.stats["total"] - before
+
+            latencies = await send_commands(api, args.commands)
+
+            async def poll_forever() -> None:
+                while True:
+                    await asyncio.gather(*(poll_cycle(api) for _ in range(args.concurrent_polls)))
+
+            polling = asyncio.create_task(poll_forever())
+            await asyncio.sleep(args.latency)
+            loaded_latencies = await send_commands(api, args.commands)
+            polling.cancel()
+            await asyncio.gather(polling, return_exceptions=True)
+
+            emulator.config.error_rate = 1.0
+            before = emulator.stats["total"]
+            for _ in range(args.outage_cycles):
+                await poll_cycle(api)
+            outage_requests = emulator.stats["total"] - before
+            outage_breaker = dict(api.circuit_breaker.stats())
+
+            emulator.config.error_rate = args.error_rate
+            await asyncio.sleep(api.circuit_breaker.retry_in)
+            await poll_cycle(api)
+            await api.async_close()
+    finally:
+        await runner.cleanup()
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    loaded_percentiles = statistics.quantiles(loaded_latencies, n=100)
+    return {
+        "startup_sec": round(startup, 4),
+        "startup_requests": startup_requests,
+        "cold_start": f"{starts['cold'][0]:.4f} s, {starts['cold'][1]} requests",
+        "cached_start": f"{starts['cached'][0]:.4f} s, {starts['cached'][1]} requests",
+        "requests_per_poll_cycle": round(requests_per_cycle, 2),
+        "duplicate_poll_requests": f"{duplicate_requests} for {args.duplicate_polls} concurrent cycles",
+        "command_p50_ms": round(percentiles[49], 2),
+        "command_p99_ms": round(percentiles[98], 2),
+        "loaded_command_p50_ms": round(loaded_percentiles[49], 2),
+        "loaded_command_p99_ms": round(loaded_percentiles[98], 2),
+        "handshakes": emulator.stats["challenges"],
+        "tcp_connections": emulator.stats["connections"],
+        "server_errors": emulator.stats["errors"],
+        "token_stats": api.token_stats,
+        "coalesce_stats": api.coalesce_stats,
+        "client_metrics": {
+            name: {key: value for key, value in metrics.items() if key != "histogram_ms"}
+            for name, metrics in api.metrics.as_dict()["endpoints"].items()
+        },
+        "request_queue": api.request_queue.stats(),
+        "outage_requests": f"{outage_requests} for {args.outage_cycles * 8} polls",
+        "outage_breaker": outage_breaker,
+        "recovered_breaker": api.circuit_breaker.stats(),
+        "state_read": measure_read_cost(args.read_rooms, args.read_switches),
+        "state_memory": measure_state_memory(args.read_rooms, args.read_switches),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--switches", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--commands", type=int, default=100)
+    parser.add_argument("--max-connections", type=int, default=2)
+    parser.add_argument("--duplicate-polls", type=int, default=4, help="identical poll cycles started together")
+    parser.add_argument("--outage-cycles", type=int, default=10, help="poll cycles while every request fails")
+    parser.add_argument("--backoff-base", type=float, default=0.2, help="first circuit breaker delay in seconds")
+    parser.add_argument("--concurrent-polls", type=int, default=2, help="poll cycles running while commands are measured")
+    parser.add_argument("--read-rooms", type=int, default=6, help="rooms of the state read and memory measurements")
+    parser.add_argument("--read-switches", type=int, default=8, help="switches per room of the state read and memory measurements")
+    args = parser.parse_args()
+
+    for key, value in asyncio.run(run(args)).items():
+        print(f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""Import the Kocom client from processes without Home Assistant.
+
+The client modules only need aiohttp, but importing them through the
+package runs its __init__, which sets up the Home Assistant integration.
+load_client_module registers the package without running it instead, so
+the emulator benchmark and the tests can use KocomClient directly.
+"""
+import sys
+import importlib
+import importlib.util
+from pathlib import Path
+from types import ModuleType
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "kocom_smart_home"
+
+
+def load_client_module() -> ModuleType:
+    """Return kocom_smart_home.client, registering the package without its __init__."""
+    if "kocom_smart_home" not in sys.modules:
+        spec = importlib.util.spec_from_loader("kocom_smart_home", loader=None, is_package=True)
+        package = importlib.util.module_from_spec(spec)
+        package.__path__ = [str(PACKAGE_DIR)]
+        sys.modules["kocom_smart_home"] = package
+    return importlib.import_module("kocom_smart_home.client")
@@ -0,0 +1,252 @@
+"""Local stand-in for the Kocom kbranch and apartment complex servers.
+
+Serves the endpoints used by the integration with digest nonces and
+PHPSESSID cookies, and can add latency, random failures and a configurable
+number of rooms and switches:
+
+    python scripts/kocom_emulator.py --port 8080 --rooms 6 --switches 8 --latency 0.05
+
+Point svrip at the emulator with --server-address (defaults to the listen
+address) and override KocomHomeAPI.API_SERVER_URL to use it as kbranch.
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import secrets
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+
+from aiohttp import web
+
+REALM = "kbranch"
+DIGEST_IKOD = "Android!1000001"
+ANDROID_MEMBERSHIP = "4990e9e16a532aa9010403b01e0ee52a"
+
+
+@dataclass
+class EmulatorConfig:
+    """Household and server behaviour of the emulator."""
+    rooms: int = 4
+    switches: int = 2
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    nonce_ttl: float = 300.0
+    zone: str = "101"
+    id: str = "1001"
+    password: str = "emulator"
+    server_address: str = ""
+    pairnum: str = "12345678"
+
+
+def _digest_response(username: str, password: str, uri: str, nonce: str) -> str:
+    """Same scheme as utils.generate_digest_header."""
+    username_hash = hashlib.md5(f"{username}:{REALM}:{password}".encode()).hexdigest()
+    uri_hash = hashlib.md5(f"GET:{uri}".encode()).hexdigest()
+    return hashlib.md5(f"{username_hash}:{nonce}:{uri_hash}".encode()).hexdigest()
+
+
+def _json_response(data: dict) -> web.Response:
+    # The real servers answer JSON with a text/html content type.
+    return web.json_response(data, content_type="text/html")
+
+
+class KocomEmulator:
+    """aiohttp application emulating kbranch and one apartment server."""
+
+    def __init__(self, config: EmulatorConfig | None = None) -> None:
+        self.config = config or EmulatorConfig()
+        self.stats: Counter = Counter()
+        self._nonces: dict[str, tuple[str, float]] = {}
+        self._peers: set = set()
+        self.devices = self._build_devices()
+
+    @property
+    def user_id(self) -> str:
+        return f"00000{self.config.zone}00{self.config.id}"
+
+    @property
+    def zone_id(self) -> str:
+        return f"00{self.config.zone}0{self.config.id}"
+
+    def _build_devices(self) -> dict[str, list]:
+        rooms = range(1, self.config.rooms + 1)
+        switches = range(1, self.config.switches + 1)
+        reg_date = "2024-01-01 00:00:00"
+
+        def room(prefix: str, number: int, functions: dict) -> dict:
+            return {
+                "id": f"{prefix}{number:02d}",
+                "reg_date": reg_date,
+                "list": [{"function": key, "value": value} for key, value in functions.items()],
+            }
+
+        return {
+            "light": [room("Lt", r, {f"sw{s:02d}": "0" for s in switches}) for r in rooms],
+            "concent": [room("Ct", r, {f"sw{s:02d}": "0" for s in switches}) for r in rooms],
+            "heat": [room("Hc", r, {"power": "0", "nowtemp": "22", "settemp": "24", "mode": "0"}) for r in rooms],
+            "aircon": [room("Ac", r, {"power": "0", "nowtemp": "26", "settemp": "24"}) for r in rooms],
+            "gas": [room("Gs", 1, {"power": "1"})],
+            "vent": [room("Vt", 1, {"power": "0", "wind": "1"})],
+            "totalcontrol": [room("Tc", 1, {"totallight": "1", "totalelevator": "0"})],
+        }
+
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/api/sphone", self.handle_sphone)
+        app.router.add_get("/api/{user_id}/pairlist", self.handle_pairlist)
+        app.router.add_get("/api/{user_id}/pairnum", self.handle_pairnum)
+        app.router.add_get("/api/{zone_id}", self.handle_handshake)
+        app.router.add_get("/api/{zone_id}/control/allstatus", self.handle_allstatus)
+        app.router.add_get("/api/{zone_id}/control", self.handle_control)
+        app.router.add_get("/api/{zone_id}/energy/stdcheck/{year_month}", self.handle_energy)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        route = request.match_info.route.resource
+        self.stats["total"] += 1
+        # Every new client port is a new TCP connection.
+        self._peers.add(request.transport.get_extra_info("peername") if request.transport else None)
+        self.stats["connections"] = len(self._peers)
+        self.stats[route.canonical if route else request.path] += 1
+
+        delay = self.config.latency + random.uniform(0, self.config.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if random.random() < self.config.error_rate:
+            self.stats["errors"] += 1
+            return web.Response(status=500, text="Internal Server Error")
+        return await handler(request)
+
+    @staticmethod
+    async def _read_json(request: web.Request) -> dict:
+        # The client sends its JSON payload in the body of GET requests.
+        body = await request.text()
+        return json.loads(body) if body else {}
+
+    def _challenge(self) -> web.Response:
+        nonce = secrets.token_hex(16)
+        session_id = secrets.token_hex(13)
+        self._nonces[nonce] = (session_id, time.monotonic() + self.config.nonce_ttl)
+        self.stats["challenges"] += 1
+        return web.Response(
+            status=401,
+            headers={
+                "WWW-Authenticate": f'Digest realm="{REALM}", nonce="{nonce}"',
+                "Set-Cookie": f"PHPSESSID={session_id}; path=/",
+            },
+        )
+
+    def _is_authorized(self, request: web.Request, username: str, password: str) -> bool:
+        fields = dict(re.findall(r'(\w+)="([^"]*)"', request.headers.get("Authorization", "")))
+        session_id, expires = self._nonces.get(fields.get("nonce"), ("", 0.0))
+        return (
+            expires > time.monotonic()
+            and request.cookies.get("PHPSESSID") == session_id
+            and fields.get("username") == username
+            and fields.get("uri") == request.path
+            and fields.get("response") == _digest_response(username, password, request.path, fields["nonce"])
+        )
+
+    async def handle_sphone(self, request: web.Request) -> web.Response:
+        if not self._is_authorized(request, DIGEST_IKOD, ANDROID_MEMBERSHIP):
+            return self._challenge()
+        return _json_response({"pwd": self.config.password, "zone": self.config.zone, "id": self.config.id})
+
+    async def handle_pairlist(self, request: web.Request) -> web.Response:
+        if not self._is_authorized(request, self.user_id, self.config.password):
+            return self._challenge()
+        return _json_response({
+            "list": [{
+                "zone": self.config.zone,
+                "id": self.config.id,
+                "svrip": self.config.server_address or request.host,
+                "alias": "Kocom Emulator",
+            }]
+        })
+
+    async def handle_pairnum(self, request: web.Request) -> web.Response:
+        if not self._is_authorized(request, self.user_id, self.config.password):
+            return self._challenge()
+        data = await self._read_json(request)
+        if data.get("pairnum") != self.config.pairnum:
+            return _json_response({"error-msg": "PairNum Fail"})
+        return _json_response({"result": "OK"})
+
+    async def handle_handshake(self, request: web.Request) -> web.Response:
+        return self._challenge()
+
+    async def handle_allstatus(self, request: web.Request) -> web.Response:
+        if not self._is_authorized(request, self.user_id, self.config.password):
+            return self._challenge()
+        data = await self._read_json(request)
+        device_type = data.get("type")
+        return _json_response({"type": device_type, "entry": self.devices.get(device_type, [])})
+
+    async def handle_control(self, request: web.Request) -> web.Response:
+        if not self._is_authorized(request, self.user_id, self.config.password):
+            return self._challenge()
+        data = await self._read_json(request)
+        device_type = data.get("type")
+        for entry in self.devices.get(device_type, []):
+            if entry["id"] != data.get("id"):
+                continue
+            for item in entry["list"]:
+                if item["function"] == data.get("function"):
+                    item["value"] = str(data.get("value"))
+            return _json_response({"type": device_type, "entry": [entry]})
+        return _json_response({"type": device_type, "entry": []})
+
+    async def handle_energy(self, request: web.Request) -> web.Response:
+        if not self._is_authorized(request, self.user_id, self.config.password):
+            return self._challenge()
+        year_month = request.match_info["year_month"]
+        year, month = int(year_month[:4]), int(year_month[4:])
+        previous = (year, month - 1) if month > 1 else (year - 1, 12)
+
+        usage = []
+        for scale, (usage_year, usage_month) in ((1.0, (year, month)), (1.2, previous)):
+            for index, energy in enumerate(["elec", "gas", "water", "hotwater", "heat"]):
+                usage.append({
+                    "energy": energy,
+                    "date": date(usage_year, usage_month, 1).isoformat(),
+                    "value": f"{(index + 1) * 10.5 * scale:.1f}",
+                    "avg": f"{(index + 1) * 11.0 * scale:.1f}",
+                    "price": f"{int((index + 1) * 1500 * scale)}",
+                })
+        return _json_response({"list": usage})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--switches", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--nonce-ttl", type=float, default=300.0)
+    parser.add_argument("--server-address", default="", help="svrip returned in the pairing list")
+    args = parser.parse_args()
+
+    emulator = KocomEmulator(EmulatorConfig(
+        rooms=args.rooms,
+        switches=args.switches,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        nonce_ttl=args.nonce_ttl,
+        server_address=args.server_address or f"{args.host}:{args.port}",
+    ))
+    web.run_app(emulator.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
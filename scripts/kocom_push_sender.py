@@ -0,0 +1,76 @@
+"""Local stand-in for a Kocom push source.
+
+Posts allstatus-shaped payloads with one changed room at a time to the push
+webhook of the integration, which is shown in the log when push is enabled
+in the options:
+
+    python scripts/kocom_push_sender.py --url http://127.0.0.1:8123/api/webhook/<id> --count 20 --interval 1
+
+The rooms and switches mirror kocom_emulator.py, so the same --rooms and
+--switches should be used as for the emulator the integration polls.
+"""
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from kocom_emulator import EmulatorConfig, KocomEmulator
+
+# Functions toggled between 0 and 1, the others are left unchanged.
+TOGGLED_FUNCTIONS = {"power", "totallight", "totalelevator"}
+
+
+def make_payload(devices: dict[str, list], device_type: str) -> dict:
+    """Flip one function of a random room and return that room as a push payload."""
+    entry = random.choice(devices[device_type])
+    item = random.choice([
+        item for item in entry["list"]
+        if item["function"] in TOGGLED_FUNCTIONS or item["function"].startswith("sw")
+    ])
+    item["value"] = "0" if item["value"] != "0" else ("255" if device_type == "light" else "1")
+    return {"type": device_type, "entry": [entry]}
+
+
+async def run(args: argparse.Namespace) -> None:
+    devices = KocomEmulator(EmulatorConfig(rooms=args.rooms, switches=args.switches)).devices
+    device_types = args.type or list(devices)
+    latencies, applied = [], 0
+
+    async with aiohttp.ClientSession() as session:
+        for _ in range(args.count):
+            payload = make_payload(devices, random.choice(device_types))
+            started = time.perf_counter()
+            async with session.post(args.url, json=payload) as response:
+                result = await response.json(content_type=None) if response.status == 200 else {}
+            latencies.append((time.perf_counter() - started) * 1000)
+            applied += result.get("applied", 0)
+            print(f"{payload['type']:<12} {payload['entry'][0]['id']}  HTTP {response.status}  {latencies[-1]:.1f} ms")
+            await asyncio.sleep(args.interval)
+
+    print(f"\n{applied}/{args.count} payloads applied, median {statistics.median(latencies):.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", required=True, help="push webhook URL of the config entry")
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--switches", type=int, default=2)
+    parser.add_argument("--count", type=int, default=10, help="number of payloads to send")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between payloads")
+    parser.add_argument(
+        "--type", action="append",
+        choices=["light", "concent", "heat", "aircon", "gas", "vent", "totalcontrol"],
+        help="device type to push, may be repeated (all by default)"
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
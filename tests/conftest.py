@@ -0,0 +1,57 @@
+"""Shared fixtures: the Kocom client imported without Home Assistant and the local emulator."""
+import sys
+from pathlib import Path
+from contextlib import asynccontextmanager
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from kocom_emulator import EmulatorConfig, KocomEmulator
+from kocom_client_loader import load_client_module
+
+
+@pytest.fixture(scope="session")
+def client_module():
+    """The kocom_smart_home.client module."""
+    return load_client_module()
+
+
+@pytest.fixture
+def emulator_client(client_module):
+    """Return an async context manager yielding (emulator, logged in KocomClient).
+
+    Keyword arguments go to EmulatorConfig, except `client_config` which
+    holds extra KocomClientConfig fields.
+    """
+
+    @asynccontextmanager
+    async def _start(client_config: dict | None = None, **config):
+        emulator = KocomEmulator(EmulatorConfig(**config))
+        runner = web.AppRunner(emulator.make_app())
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        host, port = runner.addresses[0][:2]
+        emulator.config.server_address = f"{host}:{port}"
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                api = client_module.KocomClient(session, client_module.KocomClientConfig(
+                    max_room_cnt=emulator.config.rooms,
+                    max_switch_cnt=emulator.config.switches,
+                    **(client_config or {}),
+                ))
+                api.API_SERVER_URL = f"http://{host}:{port}"
+                api.create_apartment_session()
+                await api.request_sphone_login("01000000000")
+                try:
+                    yield emulator, api
+                finally:
+                    await api.async_close()
+        finally:
+            await runner.cleanup()
+
+    return _start
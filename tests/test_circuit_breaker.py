@@ -0,0 +1,74 @@
+"""Circuit breaker of KocomClient against a failing emulator."""
+import time
+import asyncio
+
+import pytest
+
+STATUS = ("/control/allstatus", {"type": "light", "cmd": "status"})
+
+
+async def _fail_until_open(client_module, emulator, api) -> None:
+    emulator.config.error_rate = 1.0
+    for _ in range(api.config.failure_threshold):
+        assert api.circuit_breaker.state == "closed"
+        with pytest.raises(client_module.KocomServerError) as excinfo:
+            await api.request_apartment_server(*STATUS)
+        assert not isinstance(excinfo.value, client_module.CircuitOpenError)
+    assert api.circuit_breaker.state == "open"
+
+
+def test_breaker_opens_fails_fast_and_closes_after_one_probe(client_module, emulator_client):
+    """The circuit opens at the threshold, refuses requests locally and lets one probe close it."""
+
+    async def scenario():
+        config = {"failure_threshold": 3, "backoff_base": 0.3}
+        async with emulator_client(client_config=config, latency=0.05) as (emulator, api):
+            await api.ensure_apartment_token()
+            await _fail_until_open(client_module, emulator, api)
+
+            # Open: refused without reaching the server.
+            requests = emulator.stats["total"]
+            started = time.monotonic()
+            for _ in range(10):
+                with pytest.raises(client_module.CircuitOpenError):
+                    await api.request_apartment_server(*STATUS)
+            assert time.monotonic() - started < 0.05
+            assert emulator.stats["total"] == requests
+
+            # Half-open: exactly one of the concurrent requests is let through.
+            emulator.config.error_rate = 0.0
+            await asyncio.sleep(api.circuit_breaker.retry_in + 0.01)
+            results = await asyncio.gather(
+                *(api.request_apartment_server(*STATUS) for _ in range(5)), return_exceptions=True
+            )
+            assert emulator.stats["total"] == requests + 1
+            assert sum(isinstance(result, dict) for result in results) == 1
+            assert sum(isinstance(result, client_module.CircuitOpenError) for result in results) == 4
+
+            # The successful probe closed the circuit.
+            assert api.circuit_breaker.state == "closed"
+            assert (await api.request_apartment_server(*STATUS))["type"] == "light"
+
+    asyncio.run(scenario())
+
+
+def test_failed_probe_reopens_with_a_longer_delay(client_module, emulator_client):
+    """A failing half-open probe opens the circuit again with the backoff doubled."""
+
+    async def scenario():
+        config = {"failure_threshold": 2, "backoff_base": 0.2}
+        async with emulator_client(client_config=config) as (emulator, api):
+            await api.ensure_apartment_token()
+            await _fail_until_open(client_module, emulator, api)
+            first_delay = api.circuit_breaker.retry_in
+
+            await asyncio.sleep(first_delay + 0.01)
+            with pytest.raises(client_module.KocomServerError):
+                await api.request_apartment_server(*STATUS)
+
+            assert api.circuit_breaker.state == "open"
+            assert api.circuit_breaker.opened_count == 2
+            # Doubled, within the +/- 20% jitter of both delays.
+            assert api.circuit_breaker.retry_in > first_delay * 1.2
+
+    asyncio.run(scenario())
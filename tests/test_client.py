@@ -0,0 +1,70 @@
+"""KocomClient against the local emulator."""
+import asyncio
+
+import pytest
+
+ROOM_TYPES = ["light", "concent", "heat", "aircon"]
+
+
+def test_concurrent_callers_share_one_handshake(emulator_client):
+    """Concurrent token and state requests trigger a single apartment server handshake."""
+
+    async def scenario():
+        async with emulator_client(latency=0.05) as (emulator, api):
+            # The kbranch login is challenged as well, only count what follows it.
+            challenges = emulator.stats["challenges"]
+            await asyncio.gather(
+                *(api.ensure_apartment_token() for _ in range(10)),
+                *(api.update_device_state(device) for device in ROOM_TYPES for _ in range(3)),
+            )
+
+            assert emulator.stats["challenges"] - challenges == 1
+            assert api.token_stats["miss"] == 1
+            for device in ROOM_TYPES:
+                assert api.device_settings[device]["data"].functions
+
+    asyncio.run(scenario())
+
+
+def test_resizing_the_pool_keeps_queued_requests(emulator_client):
+    """Requests queued while the connection limit changes are sent on the new session."""
+
+    async def scenario():
+        config = {"max_connections": 1, "timeout": 1}
+        async with emulator_client(client_config=config, latency=0.1) as (emulator, api):
+            await api.ensure_apartment_token()
+            old_session = api.apartment_session
+            requests = [
+                asyncio.ensure_future(api.request_apartment_server("/control/allstatus", {"type": "light"}))
+                for _ in range(15)
+            ]
+            await asyncio.sleep(0.05)
+            await asyncio.gather(api.async_set_max_connections(3), *requests)
+
+            assert old_session.closed
+            assert api.request_queue.limit == 3
+            assert all(request.result()["type"] == "light" for request in requests)
+            assert api.circuit_breaker.failures == 0
+
+    asyncio.run(scenario())
+
+
+def test_malformed_status_is_an_error_and_keeps_the_state(client_module, emulator_client):
+    """A status whose entries do not parse raises instead of counting as a successful poll."""
+
+    async def scenario():
+        async with emulator_client() as (emulator, api):
+            state = await api.update_device_state("light")
+            functions = dict(state["data"].functions)
+
+            for response in (
+                {"type": "light", "entry": [{"id": "bogus", "list": [{"function": "sw01", "value": "1"}]}]},
+                {"type": "light", "entry": [{"id": "Lt99", "list": [{"function": "sw01", "value": "1"}]}]},
+                {"type": "heat", "entry": emulator.devices["light"]},
+                {"entry": emulator.devices["light"]},
+            ):
+                with pytest.raises(client_module.KocomServerError):
+                    api.merge_device_status(response, "light")
+            assert api.device_settings["light"]["data"].functions == functions
+
+    asyncio.run(scenario())
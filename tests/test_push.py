@@ -0,0 +1,122 @@
+"""Pushed device state applied through KocomPushReceiver."""
+import asyncio
+import random
+from types import SimpleNamespace
+from contextlib import asynccontextmanager
+
+import pytest
+
+from kocom_emulator import EmulatorConfig, KocomEmulator
+from kocom_push_sender import make_payload
+
+ROOM_TYPES = ["light", "concent", "heat", "aircon"]
+SINGLE_TYPES = ["gas", "vent", "totalcontrol"]
+
+
+@pytest.fixture
+def push_receiver(client_module, tmp_path):
+    """Return an async context manager yielding (receiver, emulator devices).
+
+    The coordinators of every type are seeded with the emulator state, as
+    after discovery, and their KocomClient never reaches a server.
+    """
+    from homeassistant.core import HomeAssistant
+    from kocom_smart_home.push import KocomPushReceiver
+    from kocom_smart_home.coordinator import KocomCoordinator
+
+    @asynccontextmanager
+    async def _start(rooms: int = 4, switches: int = 2):
+        hass = HomeAssistant(str(tmp_path))
+        devices = KocomEmulator(EmulatorConfig(rooms=rooms, switches=switches)).devices
+        api = client_module.KocomClient(None, client_module.KocomClientConfig(
+            max_room_cnt=rooms, max_switch_cnt=switches
+        ))
+        coordinators = {}
+        for name in ROOM_TYPES + SINGLE_TYPES + ["energy"]:
+            coordinators[name] = KocomCoordinator(name, api, hass, None)
+            if name in ROOM_TYPES:
+                api.merge_device_status({"type": name, "entry": devices[name]}, name)
+            elif name in SINGLE_TYPES:
+                await coordinators[name].get_single_device({"type": name, "entry": devices[name]})
+        try:
+            yield KocomPushReceiver(SimpleNamespace(coordinators=coordinators), "push"), devices
+        finally:
+            await hass.async_stop(force=True)
+
+    return _start
+
+
+def test_sender_payloads_are_applied(push_receiver):
+    """Every payload of the push sender updates the state of its room and renews last_synced."""
+
+    async def scenario():
+        async with push_receiver() as (receiver, devices):
+            coordinators = receiver.scheduler.coordinators
+            api = coordinators["light"].api
+            random.seed(0)
+            for _ in range(50):
+                payload = make_payload(devices, random.choice(ROOM_TYPES + SINGLE_TYPES))
+                coordinator = coordinators[payload["type"]]
+                coordinator.last_synced = None
+
+                assert receiver.async_apply(payload)
+                assert coordinator.last_synced is not None
+                entry = payload["entry"][0]
+                if payload["type"] in ROOM_TYPES:
+                    for item in entry["list"]:
+                        assert api.current_device_state(payload["type"], entry["id"], item["function"]) == int(item["value"])
+                elif payload["type"] == "gas":
+                    assert coordinator._device_info["data"]["power"] == bool(int(entry["list"][0]["value"]))
+
+            assert receiver.stats == {"received": 50, "applied": 50, "ignored": 0}
+
+    asyncio.run(scenario())
+
+
+def test_partial_payload_keeps_the_other_rooms(push_receiver):
+    """A payload with one room and one function leaves the rest of the state as it was."""
+
+    async def scenario():
+        async with push_receiver() as (receiver, devices):
+            coordinators = receiver.scheduler.coordinators
+            functions = coordinators["light"].api.device_settings["light"]["data"].functions
+            before = {key: device_function.value for key, device_function in functions.items()}
+
+            assert receiver.async_apply({"type": "light", "entry": [{"id": "Lt02", "list": [{"function": "sw01", "value": "255"}]}]})
+            assert receiver.async_apply({"type": "vent", "entry": [{"id": "Vt01", "list": [{"function": "wind", "value": "3"}]}]})
+
+            after = {key: device_function.value for key, device_function in functions.items()}
+            assert {key for key in before if before[key] != after[key]} == {("Lt02", "sw01")}
+            assert coordinators["vent"]._device_info["data"]["wind"] == "3"
+            assert coordinators["vent"]._device_info["data"]["power"] is False
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("payload", [
+    {"entry": []},
+    {"type": "energy", "entry": []},
+    {"type": "doorlock", "entry": []},
+    {"type": "light"},
+    {"type": "light", "entry": {"id": "Lt01"}},
+    {"type": "light", "entry": []},
+    {"type": "light", "entry": [{"id": "bogus", "list": [{"function": "sw01", "value": "255"}]}]},
+    {"type": "light", "entry": [{"id": "Lt09", "list": [{"function": "sw01", "value": "255"}]}]},
+    {"type": "gas", "entry": []},
+    {"type": "gas", "entry": ["Gs01"]},
+    {"type": "gas", "entry": [{"id": "Gs01"}]},
+    {"type": "gas", "entry": [{"id": "Gs01", "list": [{"function": "power", "value": "on"}]}]},
+])
+def test_malformed_payload_is_ignored(push_receiver, payload):
+    """Payloads without usable state are counted as ignored and change neither state nor last_synced."""
+
+    async def scenario():
+        async with push_receiver() as (receiver, devices):
+            coordinators = receiver.scheduler.coordinators
+            exported = {name: coordinator.export_state() for name, coordinator in coordinators.items()}
+
+            assert not receiver.async_apply(payload)
+            assert receiver.stats == {"received": 1, "applied": 0, "ignored": 1}
+            assert {name: coordinator.export_state() for name, coordinator in coordinators.items()} == exported
+
+    asyncio.run(scenario())